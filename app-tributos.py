@@ -4,7 +4,13 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from importlib.util import find_spec
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from datetime import datetime
 
 # ========== CONFIGURAÇÃO DA PÁGINA ==========
@@ -16,7 +22,9 @@ st.set_page_config(
 )
 
 # ========== CSS PERSONALIZADO ==========
-st.markdown("""
+# O bloco precisa ser emitido em toda execução: o Streamlit remove da página
+# os elementos que não são reenviados no rerun, e os estilos sumiriam
+CSS_PERSONALIZADO = """
 <style>
     .main-header {
         background: linear-gradient(90deg, #1f77b4, #ff7f0e);
@@ -56,7 +64,9 @@ st.markdown("""
         padding: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(CSS_PERSONALIZADO, unsafe_allow_html=True)
 
 # ========== HEADER PRINCIPAL ==========
 st.markdown("""
@@ -67,46 +77,155 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ========== FUNÇÃO PARA FORMATAR EM PADRÃO BR ==========
+# Função pura: valores repetidos entre reruns são formatados uma única vez por processo
+@lru_cache(maxsize=4096)
 def formatar_moeda_br(valor):
     try:
         return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
     except:
         return valor
 
+# Versão vetorizada para colunas inteiras (rótulos de gráficos): uma formatação
+# por valor e as trocas de separador feitas de uma vez com str.translate
+TROCA_SEPARADORES_BR = str.maketrans(",.", ".,")
+
+def formatar_moeda_br_serie(serie):
+    # Colunas com texto misturado aos números (ex.: "-" ou célula vazia numa coluna
+    # object) seguem valor a valor pelo formatador escalar, que devolve o texto como está
+    if not pd.api.types.is_numeric_dtype(serie):
+        return serie.map(formatar_moeda_br)
+    return "R$ " + serie.map("{:,.2f}".format).str.translate(TROCA_SEPARADORES_BR)
+
+# Acima deste número de barras por série os rótulos de valor são omitidos:
+# cada rótulo vira um nó de texto no SVG e o hover já mostra o valor
+LIMITE_ROTULOS_BARRAS = 12
+
+# Eixo de valores em reais compartilhado pelos gráficos (o tema continua sendo o
+# escolhido na sidebar; o Plotly copia o dicionário ao atribuí-lo a um eixo)
+EIXO_MOEDA_BR = dict(tickformat=".2f", tickprefix="R$ ", separatethousands=True)
+
+# ========== FORMATAÇÃO DE TABELAS ==========
+# As tabelas mostram os mesmos textos pt-BR dos cards e gráficos (R$ 1.234,56):
+# o Styler define apenas o texto exibido, e o Streamlit continua ordenando pelos números
+def tabela_formatada_br(df, colunas_moeda, colunas_percentual=()):
+    return (
+        df.style
+        .format(formatar_moeda_br, subset=list(colunas_moeda), na_rep="")
+        .format("{:.1f}%", subset=list(colunas_percentual), na_rep="")
+    )
+
+# ========== MÉTRICAS ANUAIS ==========
+# Último e penúltimo ano, seus valores e o crescimento entre eles, a partir de
+# arrays já ordenados por ano (usado nos cards de Tributos e Receita Própria)
+def metricas_anuais(anos, valores):
+    ultimo_ano = anos[-1]
+    penultimo_ano = anos[-2] if len(anos) > 1 else ultimo_ano
+    ultimo_valor = valores[-1]
+    penultimo_valor = valores[-2] if len(valores) > 1 else ultimo_valor
+    crescimento = ((ultimo_valor - penultimo_valor) / penultimo_valor * 100) if penultimo_valor > 0 else 0
+    return ultimo_ano, penultimo_ano, ultimo_valor, penultimo_valor, crescimento
+
+# ========== HASH RÁPIDO DE DATAFRAMES PARA O CACHE ==========
+# Usado como hash_funcs nas funções @st.cache_data que recebem DataFrames:
+# calcula a chave com o hasher vetorizado do pandas em vez de serializar o frame.
+# Os hashes de todas as linhas entram na chave (na ordem), pois a ordem das
+# linhas define a ordem das barras/linhas nos gráficos em cache
+def hash_rapido_df(df):
+    return (
+        df.shape,
+        tuple(df.columns),
+        tuple(map(str, df.dtypes)),
+        pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()
+    )
+
+HASH_FUNCS_DF = {pd.DataFrame: hash_rapido_df}
+
+# Limite de entradas dos caches que dependem dos filtros: cada combinação de
+# anos/tributos/meses/tema vira uma entrada, então só as mais recentes ficam em memória
+MAX_ENTRADAS_CACHE = 32
+
+# ========== LEITURA DE PLANILHAS ==========
+# Motor do pd.read_excel: o calamine (python-calamine, em Rust) lê xlsx
+# bem mais rápido que o openpyxl, que fica como alternativa quando o pacote
+# não está instalado no ambiente
+MOTOR_EXCEL = "calamine" if find_spec("python_calamine") is not None else "openpyxl"
+
 # ========== FUNÇÃO PARA CARREGAR DADOS ==========
-@st.cache_data
+# Planilhas anuais: leitura com cache por arquivo + data de modificação, gravado
+# em disco como o das abas mensais, para o xlsx só ser processado de novo quando mudar
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_ENTRADAS_CACHE)
+def ler_planilha_anual(arquivo, mtime):
+    df = pd.read_excel(arquivo, header=2, engine=MOTOR_EXCEL)
+    df = df.loc[:, [c for c in df.columns if not str(c).startswith("Unnamed")]]
+    # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
+    df.columns = [str(c).strip().upper() for c in df.columns]
+    return df
+
 def carregar_dados(arquivo):
+    if not os.path.exists(arquivo):
+        st.warning(f"📁 O arquivo '{arquivo}' não foi encontrado.")
+        return None
     try:
-        df = pd.read_excel(arquivo, header=2)
-        df = df.loc[:, ~df.columns.str.contains("^Unnamed")]
-        # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
-        df.columns = df.columns.astype(str).str.strip().str.upper()
+        df = ler_planilha_anual(arquivo, mtime_planilha(arquivo))
         df["ANO"] = df["ANO"].astype(str)
         return df
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         return None
 
-# ========== SIDEBAR ==========
-with st.sidebar:
-    st.markdown("### ⚙️ Configurações")
-    
-    # Filtros globais
-    st.markdown("### 📅 Filtros Globais")
-    
-    # Carregar dados para obter anos disponíveis de todos os arquivos
+# ========== FUNÇÃO PARA CARREGAR ABAS DE ARQUIVOS MENSAIS ==========
+# Lê todas as abas da planilha em uma única passada (dicionário aba -> DataFrame).
+# A data de modificação do arquivo entra na chave do cache, então uma planilha
+# alterada é relida automaticamente. Com persist="disk" o resultado também fica
+# gravado em ~/.streamlit/cache e é reaproveitado após reiniciar o servidor
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_ENTRADAS_CACHE)
+def carregar_abas(arquivo, mtime):
+    return pd.read_excel(arquivo, sheet_name=None, engine=MOTOR_EXCEL)
+
+# ========== VERSÃO DAS PLANILHAS EM CACHE ==========
+# O max_entries só limita a memória: o cache em disco não apaga os arquivos das
+# entradas descartadas. Por isso, quando uma planilha muda de versão (mtime), os
+# caches das leituras são limpos, inclusive em disco, e não acumulam versões antigas
+@st.cache_resource
+def versoes_planilhas():
+    return {}
+
+def mtime_planilha(arquivo):
+    mtime = os.path.getmtime(arquivo)
+    versoes = versoes_planilhas()
+    if versoes.get(arquivo, mtime) != mtime:
+        ler_planilha_anual.clear()
+        carregar_abas.clear()
+    versoes[arquivo] = mtime
+    return mtime
+
+# ========== OPÇÕES DOS FILTROS GLOBAIS ==========
+# Leitura usada em threads: recebe a versão já obtida na thread principal,
+# não chama st.* e devolve None em caso de erro (ou se o arquivo não existe)
+def tentar_ler_planilha(versao):
+    arquivo, mtime = versao
+    if mtime is None:
+        return None
+    try:
+        return ler_planilha_anual(arquivo, mtime)
+    except Exception:
+        return None
+
+# Anos e tributos disponíveis, em cache pela versão de cada planilha: nos reruns
+# é uma única consulta ao cache, e só quando uma versão é nova (primeiro acesso ou
+# planilha alterada) os arquivos são lidos, em paralelo, uma thread por arquivo
+@st.cache_data(show_spinner=False, max_entries=MAX_ENTRADAS_CACHE)
+def listar_opcoes_filtros(versoes):
     anos_disponiveis = set()
     tributos_disponiveis = set()
     
-    # Verificar anos disponíveis em todos os arquivos
-    arquivos = ["Arrecadacao Tributos.xlsx", "Receita Propria Consolidado.xlsx", "Arrecadacao Divida Ativa.xlsx"]
+    with ThreadPoolExecutor(max_workers=len(versoes)) as executor:
+        planilhas = list(executor.map(tentar_ler_planilha, versoes))
     
-    for arquivo in arquivos:
+    for (arquivo, _), df_temp in zip(versoes, planilhas):
         try:
-            df_temp = pd.read_excel(arquivo, header=2)
-            df_temp = df_temp.loc[:, ~df_temp.columns.str.contains("^Unnamed")]
-            # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
-            df_temp.columns = df_temp.columns.astype(str).str.strip().str.upper()
+            if df_temp is None:
+                continue
             if "ANO" in df_temp.columns:
                 anos_disponiveis.update(df_temp["ANO"].astype(str).tolist())
                 # Para tributos, apenas do arquivo principal
@@ -116,8 +235,310 @@ with st.sidebar:
         except:
             continue
     
-    anos_disponiveis = sorted(list(anos_disponiveis))
-    tributos_disponiveis = sorted(list(tributos_disponiveis))
+    return sorted(anos_disponiveis), sorted(tributos_disponiveis)
+
+# ========== BOTÃO DE DOWNLOAD DO ARQUIVO ORIGINAL ==========
+# O botão recebe uma função: o xlsx só é lido quando o download é clicado,
+# e não a cada execução da aba
+def ler_arquivo_bytes(arquivo):
+    with open(arquivo, "rb") as file:
+        return file.read()
+
+def botao_download_original(arquivo):
+    if not os.path.exists(arquivo):
+        st.warning("⚠️ Arquivo não disponível para download")
+        return
+    st.download_button(
+        label=f"📥 Download {arquivo}",
+        data=lambda: ler_arquivo_bytes(arquivo),
+        file_name=arquivo,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+# ========== FUNÇÃO PARA MONTAR OS GRÁFICOS DE TRIBUTOS ==========
+# Mesmo esquema dos gráficos mensais: as figuras ficam em cache pelo conteúdo do
+# frame filtrado e pelas opções da sidebar, e só são refeitas quando algo muda
+@st.cache_resource(hash_funcs=HASH_FUNCS_DF, show_spinner=False, max_entries=MAX_ENTRADAS_CACHE)
+def montar_graficos_tributos(df, tipo_grafico, tema_grafico, tipo_grafico_tributos, num_colunas_tributos, mostrar_valores):
+    tributos = [col for col in df.columns if col not in ["ANO", "TOTAL"]]
+    graficos = {"tributos": None, "empilhado": None}
+    
+    # Rótulos monetários de cada tributo, formatados uma única vez para os gráficos da aba
+    # (apenas quando há poucas barras por tributo)
+    if len(df) <= LIMITE_ROTULOS_BARRAS:
+        textos_tributos = {tributo: formatar_moeda_br_serie(df[tributo]).to_numpy() for tributo in tributos}
+    else:
+        textos_tributos = dict.fromkeys(tributos)
+    
+    # Criar gráfico baseado na seleção
+    if tipo_grafico == "Barras":
+        fig_principal = px.bar(
+            df, x="ANO", y="TOTAL" if "TOTAL" in df.columns else tributos[0],
+            title="Evolução da Arrecadação Total",
+            color_discrete_sequence=["#1f77b4"],
+            template=tema_grafico
+        )
+    elif tipo_grafico == "Linha":
+        fig_principal = px.line(
+            df, x="ANO", y="TOTAL" if "TOTAL" in df.columns else tributos[0],
+            title="Evolução da Arrecadação Total",
+            markers=True,
+            render_mode="webgl",
+            template=tema_grafico
+        )
+    elif tipo_grafico == "Área":
+        fig_principal = px.area(
+            df, x="ANO", y="TOTAL" if "TOTAL" in df.columns else tributos[0],
+            title="Evolução da Arrecadação Total",
+            template=tema_grafico
+        )
+    else:  # Pizza
+        fig_principal = px.pie(
+            df, values="TOTAL" if "TOTAL" in df.columns else tributos[0], names="ANO",
+            title="Distribuição da Arrecadação por Ano",
+            template=tema_grafico
+        )
+    
+    fig_principal.update_layout(
+        height=500,
+        showlegend=True,
+        title_x=0.5
+    )
+    
+    graficos["principal"] = fig_principal
+    
+    # Gráficos individuais por tributo em uma única figura de subplots
+    if len(tributos) > 0:
+        num_colunas = min(num_colunas_tributos, len(tributos))
+        num_linhas = (len(tributos) + num_colunas - 1) // num_colunas
+    
+        # Criar subplots
+        fig_tributos = make_subplots(
+            rows=num_linhas,
+            cols=num_colunas,
+            subplot_titles=tributos,
+            vertical_spacing=0.15,
+            horizontal_spacing=0.08
+        )
+    
+        # Cores para os gráficos
+        cores = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+    
+        # Valores do eixo de anos extraídos uma única vez para todos os tributos
+        valores_ano = df["ANO"].to_numpy()
+    
+        for i, tributo in enumerate(tributos):
+            linha = (i // num_colunas) + 1
+            coluna = (i % num_colunas) + 1
+    
+            # Extrair os valores do tributo uma única vez por iteração
+            valores_tributo = df[tributo].to_numpy()
+    
+            # Preparar texto para os valores
+            texto_valores = textos_tributos[tributo] if mostrar_valores else None
+    
+            # Criar gráfico baseado no tipo selecionado
+            if tipo_grafico_tributos == "Barras Verticais":
+                trace = go.Bar(
+                    x=valores_ano,
+                    y=valores_tributo,
+                    name=tributo,
+                    marker_color=cores[i % len(cores)],
+                    text=texto_valores,
+                    textposition="outside",
+                    textfont=dict(size=10),
+                    showlegend=False
+                )
+            elif tipo_grafico_tributos == "Barras Horizontais":
+                trace = go.Bar(
+                    x=valores_tributo,
+                    y=valores_ano,
+                    name=tributo,
+                    marker_color=cores[i % len(cores)],
+                    text=texto_valores,
+                    textposition="outside",
+                    textfont=dict(size=10),
+                    showlegend=False,
+                    orientation='h'
+                )
+            elif tipo_grafico_tributos == "Linha":
+                trace = go.Scattergl(
+                    x=valores_ano,
+                    y=valores_tributo,
+                    name=tributo,
+                    mode='lines+markers',
+                    line=dict(color=cores[i % len(cores)], width=3),
+                    marker=dict(size=8),
+                    text=texto_valores,
+                    textposition="top center",
+                    textfont=dict(size=10),
+                    showlegend=False
+                )
+            else:  # Área
+                trace = go.Scatter(
+                    x=valores_ano,
+                    y=valores_tributo,
+                    name=tributo,
+                    fill='tonexty',
+                    line=dict(color=cores[i % len(cores)]),
+                    text=texto_valores,
+                    textposition="top center",
+                    textfont=dict(size=10),
+                    showlegend=False
+                )
+    
+            fig_tributos.add_trace(trace, row=linha, col=coluna)
+    
+        # Configurar os eixos dos subplots
+        eixo_valor = dict(
+            EIXO_MOEDA_BR,
+            title_text="Valor (R$)",
+            title_font=dict(size=12),
+            tickfont=dict(size=10)
+        )
+        eixo_ano = dict(
+            title_text="Ano",
+            title_font=dict(size=12),
+            tickfont=dict(size=10)
+        )
+    
+        if tipo_grafico_tributos == "Barras Horizontais":
+            # Para barras horizontais, inverter os eixos
+            eixo_x, eixo_y = eixo_valor, eixo_ano
+        else:
+            eixo_x, eixo_y = eixo_ano, eixo_valor
+        
+        # Apenas as células com gráfico, em uma única atualização do layout: os eixos
+        # do make_subplots são numerados por linha (xaxis, xaxis2, ...) na mesma ordem
+        # em que os tributos foram adicionados; as células vazias ficam sem eixos formatados
+        eixos_preenchidos = {}
+        for n in range(1, len(tributos) + 1):
+            sufixo = "" if n == 1 else str(n)
+            eixos_preenchidos[f"xaxis{sufixo}"] = eixo_x
+            eixos_preenchidos[f"yaxis{sufixo}"] = eixo_y
+        fig_tributos.update_layout(**eixos_preenchidos)
+    
+        fig_tributos.update_layout(
+            title=f"Gráficos de {tipo_grafico_tributos} por Tributo",
+            height=350 * num_linhas,
+            template=tema_grafico,
+            title_x=0.5,
+            showlegend=False,
+            margin=dict(l=50, r=50, t=80, b=50),
+            title_font=dict(size=18)
+        )
+    
+        # Ajustar tamanho dos títulos dos subplots
+        fig_tributos.update_annotations(font_size=14)
+    
+        graficos["tributos"] = fig_tributos
+    
+        # Gráfico de barras empilhadas para todos os tributos
+        # Montar todas as barras de uma vez (uma única validação da figura)
+        traces_empilhado = [
+            go.Bar(
+                name=tributo,
+                x=df["ANO"],
+                y=df[tributo],
+                text=textos_tributos[tributo],
+                textposition="auto",
+            )
+            for tributo in tributos
+        ]
+        fig_empilhado = go.Figure(data=traces_empilhado)
+    
+        fig_empilhado.update_layout(
+            title="Composição da Arrecadação por Tributo",
+            barmode="stack",
+            height=500,
+            template=tema_grafico,
+            title_x=0.5
+        )
+    
+        graficos["empilhado"] = fig_empilhado
+    
+    return graficos
+
+# ========== FUNÇÃO PARA MONTAR OS GRÁFICOS DE RECEITA PRÓPRIA ==========
+# Figuras em cache pelo conteúdo do frame filtrado (com os rótulos, quando há)
+# e pelo tema, como nas demais abas
+@st.cache_resource(hash_funcs=HASH_FUNCS_DF, show_spinner=False, max_entries=MAX_ENTRADAS_CACHE)
+def montar_graficos_receita(df_receita, coluna_valor_receita, tema_grafico):
+    # Gráfico de barras
+    fig_receita_bar = px.bar(
+        df_receita,
+        x="ANO",
+        y=coluna_valor_receita,
+        title="Receita Própria Total por Ano",
+        labels={"ANO": "Ano", coluna_valor_receita: "Valor (R$)"},
+        text="TEXTO_FORMATADO" if "TEXTO_FORMATADO" in df_receita.columns else None,
+        color_discrete_sequence=["#4682B4"],
+        template=tema_grafico
+    )
+    
+    fig_receita_bar.update_traces(
+        textposition="outside",
+        textfont=dict(size=12)
+    )
+    
+    fig_receita_bar.update_layout(
+        height=400,
+        title_x=0.5,
+        yaxis=EIXO_MOEDA_BR,
+        bargap=0.3
+    )
+    
+    # Gráfico de área
+    fig_receita_area = px.area(
+        df_receita,
+        x="ANO",
+        y=coluna_valor_receita,
+        title="Evolução da Receita Própria",
+        template=tema_grafico
+    )
+    
+    fig_receita_area.update_layout(
+        height=400,
+        title_x=0.5,
+        yaxis=EIXO_MOEDA_BR
+    )
+    
+    # Gráfico de linha
+    fig_receita_line = px.line(
+        df_receita,
+        x="ANO",
+        y=coluna_valor_receita,
+        title="Evolução da Receita Própria (Linha)",
+        markers=True,
+        render_mode="webgl",
+        template=tema_grafico
+    )
+    
+    fig_receita_line.update_layout(
+        height=400,
+        title_x=0.5,
+        yaxis=EIXO_MOEDA_BR
+    )
+    
+    return {"barras": fig_receita_bar, "area": fig_receita_area, "linha": fig_receita_line}
+
+# ========== SIDEBAR ==========
+with st.sidebar:
+    st.markdown("### ⚙️ Configurações")
+    
+    # Filtros globais
+    st.markdown("### 📅 Filtros Globais")
+    
+    # Verificar anos disponíveis em todos os arquivos
+    arquivos = ["Arrecadacao Tributos.xlsx", "Receita Propria Consolidado.xlsx", "Arrecadacao Divida Ativa.xlsx"]
+    
+    # Versão (mtime) de cada arquivo obtida aqui, na thread principal; arquivos
+    # ausentes entram com None e são ignorados
+    versoes = tuple(
+        (arquivo, mtime_planilha(arquivo) if os.path.exists(arquivo) else None)
+        for arquivo in arquivos
+    )
+    anos_disponiveis, tributos_disponiveis = listar_opcoes_filtros(versoes)
     
     # Filtro de anos global
     anos_selecionados = st.multiselect(
@@ -206,397 +627,210 @@ with st.sidebar:
     )
 
 # ========== SISTEMA DE ABAS ==========
+# Com on_change="rerun" o Streamlit acompanha a aba selecionada: só o conteúdo
+# da aba aberta (tab.open) é executado, as demais não leem planilhas nem montam gráficos
 tab1, tab2, tab3, tab4 = st.tabs([
     "🏛️ Arrecadação Tributos", 
     "💰 Receita Própria",
     "📈 Evolução Arrecadação",
     "💳 Arrecadação Dívida Ativa"
-])
+], key="aba_ativa", on_change="rerun")
 
 # ========== ABA 1: ARRECADAÇÃO TRIBUTOS ==========
 with tab1:
-    st.markdown("## 🏛️ Arrecadação Tributos")
-    
-    # Informações sobre o arquivo fonte
-    st.markdown("### 📁 Arquivo Fonte dos Dados")
-    col_info1, col_info2 = st.columns([2, 1])
-    
-    with col_info1:
-        st.info("""
-        **📊 Fonte:** `Arrecadacao Tributos.xlsx`
-        
-        **📋 Descrição:** Dados consolidados de arrecadação tributária municipal, 
-        contendo valores anuais por tipo de tributo.
-        
-        **📅 Período:** Dados históricos de arrecadação por ano
-        **🏛️ Tributos:** IPTU, ISS, ITBI, Taxas, Multas e outros tributos municipais
-        """)
-    
-    with col_info2:
-        # Verificar se o arquivo existe e mostrar informações
-        try:
-            import os
-            arquivo_info = "Arrecadacao Tributos.xlsx"
-            if os.path.exists(arquivo_info):
-                stat_info = os.stat(arquivo_info)
-                tamanho_mb = stat_info.st_size / (1024 * 1024)
-                data_modificacao = datetime.fromtimestamp(stat_info.st_mtime)
-                
-                st.success(f"""
-                ✅ **Arquivo encontrado**
-                
-                📏 **Tamanho:** {tamanho_mb:.2f} MB
-                📅 **Última modificação:** {data_modificacao.strftime('%d/%m/%Y %H:%M')}
-                """)
-            else:
-                st.error("❌ Arquivo não encontrado")
-        except Exception as e:
-            st.warning(f"⚠️ Erro ao verificar arquivo: {e}")
-    
-    st.markdown("---")
-    
-    # Botão para download do arquivo original
-    st.markdown("### 💾 Download do Arquivo Original")
-    try:
-        with open("Arrecadacao Tributos.xlsx", "rb") as file:
-            st.download_button(
-                label="📥 Download Arrecadacao Tributos.xlsx",
-                data=file.read(),
-                file_name="Arrecadacao Tributos.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-    except FileNotFoundError:
-        st.warning("⚠️ Arquivo não disponível para download")
-    except Exception as e:
-        st.error(f"❌ Erro ao preparar download: {e}")
-    
-    st.markdown("---")
-    
-    # Carregar dados
-    df = carregar_dados("Arrecadacao Tributos.xlsx")
-    
-    # Mostrar prévia dos dados
-    if df is not None and not df.empty:
-        st.markdown("### 👀 Prévia dos Dados")
-        st.info(f"""
-        **📊 Estrutura dos dados:**
-        - **Linhas:** {len(df)} registros
-        - **Colunas:** {len(df.columns)} campos
-        - **Colunas disponíveis:** {', '.join(df.columns.tolist())}
-        """)
-        
-        # Mostrar primeiras linhas dos dados
-        with st.expander("📋 Ver primeiras linhas dos dados", expanded=False):
-            st.dataframe(df.head(10), use_container_width=True)
-    else:
-        st.warning("⚠️ Não foi possível carregar os dados para mostrar a prévia")
-    
-    # Mostrar filtros aplicados
-    if anos_selecionados or tributos_selecionados:
-        st.markdown("### 🔍 Filtros Aplicados")
-        col_filtro1, col_filtro2 = st.columns(2)
-        
-        with col_filtro1:
-            if anos_selecionados:
-                st.info(f"📅 **Anos selecionados:** {', '.join(anos_selecionados)}")
-        
-        with col_filtro2:
-            if tributos_selecionados:
-                st.info(f"🏛️ **Tributos selecionados:** {', '.join(tributos_selecionados)}")
-    
-    if df is None:
-        st.error("Não foi possível carregar os dados. Verifique se o arquivo existe.")
-    else:
-        # Filtrar por anos selecionados (filtro global)
-        if anos_selecionados:
-            df = df[df["ANO"].isin(anos_selecionados)]
-        
-        # Filtrar por tributos selecionados (filtro global)
-        if tributos_selecionados:
-            colunas_para_manter = ["ANO"] + tributos_selecionados
-            if "TOTAL" in df.columns:
-                colunas_para_manter.append("TOTAL")
-            df = df[colunas_para_manter]
-        
-        # Verificar se há dados após filtros
-        if df.empty:
-            st.warning("⚠️ Nenhum dado encontrado com os filtros aplicados. Tente ajustar os filtros na sidebar.")
-        else:
-            # Métricas principais
-            st.markdown("### 📊 Métricas Principais")
-        
-        # Calcular métricas
-        ultimo_ano = df["ANO"].max()
-        penultimo_ano = df["ANO"].iloc[-2] if len(df) > 1 else ultimo_ano
+    if tab1.open:
+        st.markdown("## 🏛️ Arrecadação Tributos")
         
-        ultimo_total = df[df["ANO"] == ultimo_ano]["TOTAL"].iloc[0] if "TOTAL" in df.columns else 0
-        penultimo_total = df[df["ANO"] == penultimo_ano]["TOTAL"].iloc[0] if "TOTAL" in df.columns else 0
+        # Informações sobre o arquivo fonte
+        st.markdown("### 📁 Arquivo Fonte dos Dados")
+        col_info1, col_info2 = st.columns([2, 1])
         
-        crescimento = ((ultimo_total - penultimo_total) / penultimo_total * 100) if penultimo_total > 0 else 0
-        
-        # Layout de métricas em colunas
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{formatar_moeda_br(ultimo_total)}</div>
-                <div class="metric-label">Arrecadação {ultimo_ano}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{formatar_moeda_br(penultimo_total)}</div>
-                <div class="metric-label">Arrecadação {penultimo_ano}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{crescimento:.1f}%</div>
-                <div class="metric-label">Crescimento Anual</div>
-            </div>
-            """, unsafe_allow_html=True)
+        with col_info1:
+            st.info("""
+            **📊 Fonte:** `Arrecadacao Tributos.xlsx`
+            
+            **📋 Descrição:** Dados consolidados de arrecadação tributária municipal, 
+            contendo valores anuais por tipo de tributo.
+            
+            **📅 Período:** Dados históricos de arrecadação por ano
+            **🏛️ Tributos:** IPTU, ISS, ITBI, Taxas, Multas e outros tributos municipais
+            """)
         
-        with col4:
-            media_anual = df["TOTAL"].mean() if "TOTAL" in df.columns else 0
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{formatar_moeda_br(media_anual)}</div>
-                <div class="metric-label">Média Anual</div>
-            </div>
-            """, unsafe_allow_html=True)
+        with col_info2:
+            # Verificar se o arquivo existe e mostrar informações
+            try:
+                import os
+                arquivo_info = "Arrecadacao Tributos.xlsx"
+                if os.path.exists(arquivo_info):
+                    stat_info = os.stat(arquivo_info)
+                    tamanho_mb = stat_info.st_size / (1024 * 1024)
+                    data_modificacao = datetime.fromtimestamp(stat_info.st_mtime)
+                    
+                    st.success(f"""
+                    ✅ **Arquivo encontrado**
+                    
+                    📏 **Tamanho:** {tamanho_mb:.2f} MB
+                    📅 **Última modificação:** {data_modificacao.strftime('%d/%m/%Y %H:%M')}
+                    """)
+                else:
+                    st.error("❌ Arquivo não encontrado")
+            except Exception as e:
+                st.warning(f"⚠️ Erro ao verificar arquivo: {e}")
         
-        # Gráfico principal
-        st.markdown("### 📈 Análise Temporal")
+        st.markdown("---")
         
-        # Lista de tributos
-        tributos = [col for col in df.columns if col not in ["ANO", "TOTAL"]]
+        # Botão para download do arquivo original
+        st.markdown("### 💾 Download do Arquivo Original")
+        botao_download_original("Arrecadacao Tributos.xlsx")
         
-        # Criar gráfico baseado na seleção
-        if tipo_grafico == "Barras":
-            fig_principal = px.bar(
-                df, x="ANO", y="TOTAL" if "TOTAL" in df.columns else tributos[0],
-                title="Evolução da Arrecadação Total",
-                color_discrete_sequence=["#1f77b4"],
-                template=tema_grafico
-            )
-        elif tipo_grafico == "Linha":
-            fig_principal = px.line(
-                df, x="ANO", y="TOTAL" if "TOTAL" in df.columns else tributos[0],
-                title="Evolução da Arrecadação Total",
-                markers=True,
-                template=tema_grafico
-            )
-        elif tipo_grafico == "Área":
-            fig_principal = px.area(
-                df, x="ANO", y="TOTAL" if "TOTAL" in df.columns else tributos[0],
-                title="Evolução da Arrecadação Total",
-                template=tema_grafico
-            )
-        else:  # Pizza
-            fig_principal = px.pie(
-                df, values="TOTAL" if "TOTAL" in df.columns else tributos[0], names="ANO",
-                title="Distribuição da Arrecadação por Ano",
-                template=tema_grafico
-            )
+        st.markdown("---")
         
-        fig_principal.update_layout(
-            height=500,
-            showlegend=True,
-            title_x=0.5
-        )
+        # Carregar dados
+        df = carregar_dados("Arrecadacao Tributos.xlsx")
         
-        st.plotly_chart(fig_principal, use_container_width=True)
+        # Mostrar prévia dos dados
+        if df is not None and not df.empty:
+            st.markdown("### 👀 Prévia dos Dados")
+            st.info(f"""
+            **📊 Estrutura dos dados:**
+            - **Linhas:** {len(df)} registros
+            - **Colunas:** {len(df.columns)} campos
+            - **Colunas disponíveis:** {', '.join(df.columns.tolist())}
+            """)
+            
+            # Mostrar primeiras linhas dos dados
+            with st.expander("📋 Ver primeiras linhas dos dados", expanded=False):
+                st.dataframe(df.head(10), width="stretch")
+        else:
+            st.warning("⚠️ Não foi possível carregar os dados para mostrar a prévia")
         
-        # Gráficos de barra vertical por tributo
-        st.markdown(f"### 📊 Gráficos de {tipo_grafico_tributos} por Tributo")
+        # Mostrar filtros aplicados
+        if anos_selecionados or tributos_selecionados:
+            st.markdown("### 🔍 Filtros Aplicados")
+            col_filtro1, col_filtro2 = st.columns(2)
+            
+            with col_filtro1:
+                if anos_selecionados:
+                    st.info(f"📅 **Anos selecionados:** {', '.join(anos_selecionados)}")
+            
+            with col_filtro2:
+                if tributos_selecionados:
+                    st.info(f"🏛️ **Tributos selecionados:** {', '.join(tributos_selecionados)}")
         
-        # Criar gráficos individuais para cada tributo
-        if len(tributos) > 0:
-            # Determinar o número de colunas baseado na configuração da sidebar
-            num_colunas = min(num_colunas_tributos, len(tributos))
-            num_linhas = (len(tributos) + num_colunas - 1) // num_colunas
+        if df is None:
+            st.error("Não foi possível carregar os dados. Verifique se o arquivo existe.")
+        else:
+            # Filtrar por anos e tributos selecionados (filtros globais) em uma única seleção
+            mascara_anos = df["ANO"].isin(anos_selecionados) if anos_selecionados else slice(None)
+            if tributos_selecionados:
+                colunas_para_manter = ["ANO"] + tributos_selecionados
+                if "TOTAL" in df.columns:
+                    colunas_para_manter.append("TOTAL")
+                df = df.loc[mascara_anos, colunas_para_manter]
+            else:
+                df = df.loc[mascara_anos]
             
-            # Informações sobre a configuração
-            st.info(f"""
-            📋 **Configuração atual:** {num_colunas_tributos} gráficos por linha
-            - Total de tributos: {len(tributos)}
-            - Layout: {num_linhas} linha(s) × {num_colunas} coluna(s)
-            - Use o controle na sidebar para ajustar o número de colunas
-            """)
+            # Verificar se há dados após filtros
+            if df.empty:
+                st.warning("⚠️ Nenhum dado encontrado com os filtros aplicados. Tente ajustar os filtros na sidebar.")
+            else:
+                # Métricas principais
+                st.markdown("### 📊 Métricas Principais")
             
-            # Criar subplots
-            fig_tributos = make_subplots(
-                rows=num_linhas,
-                cols=num_colunas,
-                subplot_titles=tributos,
-                vertical_spacing=0.15,
-                horizontal_spacing=0.08
-            )
+            # Calcular métricas
+            # Ordenar uma única vez por ano e ler último/penúltimo por posição
+            df_por_ano = df.sort_values("ANO")
+            anos_ordenados = df_por_ano["ANO"].to_numpy()
+            if "TOTAL" in df.columns:
+                totais_ordenados = df_por_ano["TOTAL"].to_numpy()
+            else:
+                totais_ordenados = np.zeros(len(anos_ordenados))
             
-            # Cores para os gráficos
-            cores = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+            ultimo_ano, penultimo_ano, ultimo_total, penultimo_total, crescimento = metricas_anuais(anos_ordenados, totais_ordenados)
             
-            for i, tributo in enumerate(tributos):
-                linha = (i // num_colunas) + 1
-                coluna = (i % num_colunas) + 1
-                
-                # Preparar texto para os valores
-                texto_valores = [formatar_moeda_br(val) for val in df[tributo]] if mostrar_valores else None
-                
-                # Criar gráfico baseado no tipo selecionado
-                if tipo_grafico_tributos == "Barras Verticais":
-                    trace = go.Bar(
-                        x=df["ANO"],
-                        y=df[tributo],
-                        name=tributo,
-                        marker_color=cores[i % len(cores)],
-                        text=texto_valores,
-                        textposition="outside",
-                        textfont=dict(size=10),
-                        showlegend=False
-                    )
-                elif tipo_grafico_tributos == "Barras Horizontais":
-                    trace = go.Bar(
-                        x=df[tributo],
-                        y=df["ANO"],
-                        name=tributo,
-                        marker_color=cores[i % len(cores)],
-                        text=texto_valores,
-                        textposition="outside",
-                        textfont=dict(size=10),
-                        showlegend=False,
-                        orientation='h'
-                    )
-                elif tipo_grafico_tributos == "Linha":
-                    trace = go.Scatter(
-                        x=df["ANO"],
-                        y=df[tributo],
-                        name=tributo,
-                        mode='lines+markers',
-                        line=dict(color=cores[i % len(cores)], width=3),
-                        marker=dict(size=8),
-                        text=texto_valores,
-                        textposition="top center",
-                        textfont=dict(size=10),
-                        showlegend=False
-                    )
-                else:  # Área
-                    trace = go.Scatter(
-                        x=df["ANO"],
-                        y=df[tributo],
-                        name=tributo,
-                        fill='tonexty',
-                        line=dict(color=cores[i % len(cores)]),
-                        text=texto_valores,
-                        textposition="top center",
-                        textfont=dict(size=10),
-                        showlegend=False
-                    )
-                
-                fig_tributos.add_trace(trace, row=linha, col=coluna)
+            # Layout de métricas em colunas
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-value">{formatar_moeda_br(ultimo_total)}</div>
+                    <div class="metric-label">Arrecadação {ultimo_ano}</div>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            with col2:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-value">{formatar_moeda_br(penultimo_total)}</div>
+                    <div class="metric-label">Arrecadação {penultimo_ano}</div>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            with col3:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-value">{crescimento:.1f}%</div>
+                    <div class="metric-label">Crescimento Anual</div>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            with col4:
+                media_anual = df["TOTAL"].mean() if "TOTAL" in df.columns else 0
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-value">{formatar_moeda_br(media_anual)}</div>
+                    <div class="metric-label">Média Anual</div>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            # Gráfico principal
+            st.markdown("### 📈 Análise Temporal")
+            
+            # Lista de tributos
+            tributos = [col for col in df.columns if col not in ["ANO", "TOTAL"]]
+            
+            graficos = montar_graficos_tributos(df, tipo_grafico, tema_grafico, tipo_grafico_tributos, num_colunas_tributos, mostrar_valores)
+            
+            st.plotly_chart(graficos["principal"], width="stretch")
+            
+            # Gráficos de barra vertical por tributo
+            st.markdown(f"### 📊 Gráficos de {tipo_grafico_tributos} por Tributo")
+            
+            # Criar gráficos individuais para cada tributo
+            if len(tributos) > 0:
+                # Determinar o número de colunas baseado na configuração da sidebar
+                num_colunas = min(num_colunas_tributos, len(tributos))
+                num_linhas = (len(tributos) + num_colunas - 1) // num_colunas
+                
+                # Informações sobre a configuração
+                st.info(f"""
+                📋 **Configuração atual:** {num_colunas_tributos} gráficos por linha
+                - Total de tributos: {len(tributos)}
+                - Layout: {num_linhas} linha(s) × {num_colunas} coluna(s)
+                - Use o controle na sidebar para ajustar o número de colunas
+                """)
                 
-                # Configurar eixos baseado no tipo de gráfico
-                if tipo_grafico_tributos == "Barras Horizontais":
-                    # Para barras horizontais, inverter os eixos
-                    fig_tributos.update_xaxes(
-                        title_text="Valor (R$)",
-                        row=linha,
-                        col=coluna,
-                        tickformat=".2f",
-                        tickprefix="R$ ",
-                        separatethousands=True,
-                        title_font=dict(size=12),
-                        tickfont=dict(size=10)
-                    )
-                    
-                    fig_tributos.update_yaxes(
-                        title_text="Ano",
-                        row=linha,
-                        col=coluna,
-                        title_font=dict(size=12),
-                        tickfont=dict(size=10)
-                    )
-                else:
-                    # Para outros tipos de gráfico
-                    fig_tributos.update_yaxes(
-                        title_text="Valor (R$)",
-                        row=linha,
-                        col=coluna,
-                        tickformat=".2f",
-                        tickprefix="R$ ",
-                        separatethousands=True,
-                        title_font=dict(size=12),
-                        tickfont=dict(size=10)
-                    )
-                    
-                    fig_tributos.update_xaxes(
-                        title_text="Ano",
-                        row=linha,
-                        col=coluna,
-                        title_font=dict(size=12),
-                        tickfont=dict(size=10)
-                    )
+                st.plotly_chart(graficos["tributos"], width="stretch")
             
-            fig_tributos.update_layout(
-                title=f"Gráficos de {tipo_grafico_tributos} por Tributo",
-                height=350 * num_linhas,
-                template=tema_grafico,
-                title_x=0.5,
-                showlegend=False,
-                margin=dict(l=50, r=50, t=80, b=50),
-                title_font=dict(size=18)
-            )
+            # Gráficos comparativos
+            st.markdown("### 🔍 Análise Comparativa")
             
-            # Ajustar tamanho dos títulos dos subplots
-            fig_tributos.update_annotations(font_size=14)
+            # Gráfico de barras empilhadas para todos os tributos
+            if len(tributos) > 0:
+                st.plotly_chart(graficos["empilhado"], width="stretch")
             
-            st.plotly_chart(fig_tributos, use_container_width=True)
-        
-        # Gráficos comparativos
-        st.markdown("### 🔍 Análise Comparativa")
-        
-        # Gráfico de barras empilhadas para todos os tributos
-        if len(tributos) > 0:
-            fig_empilhado = go.Figure()
+            # Tabela interativa
+            st.markdown("### 📋 Dados Detalhados")
             
-            for tributo in tributos:
-                fig_empilhado.add_trace(go.Bar(
-                    name=tributo,
-                    x=df["ANO"],
-                    y=df[tributo],
-                    text=[formatar_moeda_br(val) for val in df[tributo]],
-                    textposition="auto",
-                ))
+            # Valores exibidos em R$ no padrão BR (a tabela mantém os números para ordenação)
+            colunas_numericas = [col for col in df.columns if col != "ANO"]
             
-            fig_empilhado.update_layout(
-                title="Composição da Arrecadação por Tributo",
-                barmode="stack",
-                height=500,
-                template=tema_grafico,
-                title_x=0.5
+            st.dataframe(
+                tabela_formatada_br(df, colunas_numericas),
+                width="stretch",
+                hide_index=True
             )
-            
-            st.plotly_chart(fig_empilhado, use_container_width=True)
-        
-        # Tabela interativa
-        st.markdown("### 📋 Dados Detalhados")
-        
-        # Formatar dados para exibição
-        df_formatado = df.copy()
-        for col in df_formatado.columns:
-            if col != "ANO":
-                df_formatado[col] = df_formatado[col].apply(formatar_moeda_br)
-        
-        st.dataframe(
-            df_formatado,
-            use_container_width=True,
-            hide_index=True
-        )
 
 
 
@@ -604,928 +838,463 @@ with tab1:
 
 # ========== ABA 2: RECEITA PRÓPRIA ==========
 with tab2:
-    st.markdown("## 💰 Receita Própria Consolidada")
-    
-    # Informações sobre o arquivo fonte
-    st.markdown("### 📁 Arquivo Fonte dos Dados")
-    col_info1, col_info2 = st.columns([2, 1])
-    
-    with col_info1:
-        st.info("""
-        **📊 Fonte:** `Receita Propria Consolidado.xlsx`
-        
-        **📋 Descrição:** Dados consolidados de receita própria municipal, 
-        contendo valores anuais de receitas próprias.
-        
-        **📅 Período:** Dados históricos de receita própria por ano
-        **💰 Tipo:** Receitas próprias consolidadas do município
-        """)
-    
-    with col_info2:
-        # Verificar se o arquivo existe e mostrar informações
-        try:
-            import os
-            arquivo_info = "Receita Propria Consolidado.xlsx"
-            if os.path.exists(arquivo_info):
-                stat_info = os.stat(arquivo_info)
-                tamanho_mb = stat_info.st_size / (1024 * 1024)
-                data_modificacao = datetime.fromtimestamp(stat_info.st_mtime)
-                
-                st.success(f"""
-                ✅ **Arquivo encontrado**
-                
-                📏 **Tamanho:** {tamanho_mb:.2f} MB
-                📅 **Última modificação:** {data_modificacao.strftime('%d/%m/%Y %H:%M')}
-                """)
-            else:
-                st.error("❌ Arquivo não encontrado")
-        except Exception as e:
-            st.warning(f"⚠️ Erro ao verificar arquivo: {e}")
-    
-    st.markdown("---")
-    
-    # Botão para download do arquivo original
-    st.markdown("### 💾 Download do Arquivo Original")
-    try:
-        with open("Receita Propria Consolidado.xlsx", "rb") as file:
-            st.download_button(
-                label="📥 Download Receita Propria Consolidado.xlsx",
-                data=file.read(),
-                file_name="Receita Propria Consolidado.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-    except FileNotFoundError:
-        st.warning("⚠️ Arquivo não disponível para download")
-    except Exception as e:
-        st.error(f"❌ Erro ao preparar download: {e}")
-    
-    st.markdown("---")
-    
-    try:
-        # Carregar dados de receita própria
-        df_receita = carregar_dados("Receita Propria Consolidado.xlsx")
+    if tab2.open:
+        st.markdown("## 💰 Receita Própria Consolidada")
         
-        # Mostrar prévia dos dados
-        if df_receita is not None and not df_receita.empty:
-            st.markdown("### 👀 Prévia dos Dados")
-            st.info(f"""
-            **📊 Estrutura dos dados:**
-            - **Linhas:** {len(df_receita)} registros
-            - **Colunas:** {len(df_receita.columns)} campos
-            - **Colunas disponíveis:** {', '.join(df_receita.columns.tolist())}
-            """)
-            
-            # Mostrar primeiras linhas dos dados
-            with st.expander("📋 Ver primeiras linhas dos dados", expanded=False):
-                st.dataframe(df_receita.head(10), use_container_width=True)
-        else:
-            st.warning("⚠️ Não foi possível carregar os dados para mostrar a prévia")
+        # Informações sobre o arquivo fonte
+        st.markdown("### 📁 Arquivo Fonte dos Dados")
+        col_info1, col_info2 = st.columns([2, 1])
         
-        if df_receita is None:
-            st.error("Não foi possível carregar os dados de receita própria.")
-        else:
-            # Mostrar filtros aplicados
-            if anos_selecionados:
-                st.info(f"📅 **Anos selecionados:** {', '.join(anos_selecionados)}")
+        with col_info1:
+            st.info("""
+            **📊 Fonte:** `Receita Propria Consolidado.xlsx`
             
-            # Filtrar por anos selecionados (filtro global)
-            if anos_selecionados:
-                df_receita = df_receita[df_receita["ANO"].isin(anos_selecionados)]
+            **📋 Descrição:** Dados consolidados de receita própria municipal, 
+            contendo valores anuais de receitas próprias.
             
-            # Verificar se há dados após filtros
-            if df_receita.empty:
-                st.warning("⚠️ Nenhum dado encontrado com os filtros aplicados. Tente ajustar os filtros na sidebar.")
-            elif "ANO" not in df_receita.columns:
-                st.error("A coluna 'ANO' não foi encontrada no arquivo 'Receita Propria Consolidado.xlsx'.")
-            else:
-                coluna_valor_receita = [col for col in df_receita.columns if col != "ANO"][0]
-                
-                # Métricas de receita própria
-                ultimo_ano_receita = df_receita["ANO"].max()
-                penultimo_ano_receita = df_receita["ANO"].iloc[-2] if len(df_receita) > 1 else ultimo_ano_receita
-                
-                ultimo_valor_receita = df_receita[df_receita["ANO"] == ultimo_ano_receita][coluna_valor_receita].iloc[0]
-                penultimo_valor_receita = df_receita[df_receita["ANO"] == penultimo_ano_receita][coluna_valor_receita].iloc[0]
-                
-                crescimento_receita = ((ultimo_valor_receita - penultimo_valor_receita) / penultimo_valor_receita * 100) if penultimo_valor_receita > 0 else 0
-                media_receita = df_receita[coluna_valor_receita].mean()
-                
-                # Layout de métricas
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <div class="metric-value">{formatar_moeda_br(ultimo_valor_receita)}</div>
-                        <div class="metric-label">Receita {ultimo_ano_receita}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col2:
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <div class="metric-value">{formatar_moeda_br(penultimo_valor_receita)}</div>
-                        <div class="metric-label">Receita {penultimo_ano_receita}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col3:
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <div class="metric-value">{crescimento_receita:.1f}%</div>
-                        <div class="metric-label">Crescimento Receita</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col4:
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <div class="metric-value">{formatar_moeda_br(media_receita)}</div>
-                        <div class="metric-label">Média Anual Receita</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Gráficos de receita própria
-                col_receita1, col_receita2 = st.columns(2)
-                
-                with col_receita1:
-                    # Gráfico de barras
-                    df_receita["TEXTO_FORMATADO"] = df_receita[coluna_valor_receita].apply(formatar_moeda_br)
-                    
-                    fig_receita_bar = px.bar(
-                        df_receita,
-                        x="ANO",
-                        y=coluna_valor_receita,
-                        title="Receita Própria Total por Ano",
-                        labels={"ANO": "Ano", coluna_valor_receita: "Valor (R$)"},
-                        text="TEXTO_FORMATADO",
-                        color_discrete_sequence=["#4682B4"],
-                        template=tema_grafico
-                    )
-                    
-                    fig_receita_bar.update_traces(
-                        textposition="outside",
-                        textfont=dict(size=12)
-                    )
-                    
-                    fig_receita_bar.update_layout(
-                        height=400,
-                        title_x=0.5,
-                        yaxis=dict(
-                            tickformat=".2f",
-                            tickprefix="R$ ",
-                            separatethousands=True,
-                        ),
-                        bargap=0.3
-                    )
-                    
-                    st.plotly_chart(fig_receita_bar, use_container_width=True)
-                
-                with col_receita2:
-                    # Gráfico de área
-                    fig_receita_area = px.area(
-                        df_receita,
-                        x="ANO",
-                        y=coluna_valor_receita,
-                        title="Evolução da Receita Própria",
-                        template=tema_grafico
-                    )
-                    
-                    fig_receita_area.update_layout(
-                        height=400,
-                        title_x=0.5,
-                        yaxis=dict(
-                            tickformat=".2f",
-                            tickprefix="R$ ",
-                            separatethousands=True,
-                        )
-                    )
-                    
-                    st.plotly_chart(fig_receita_area, use_container_width=True)
-                
-                # Gráfico de linha
-                st.markdown("### 📈 Evolução Temporal")
-                fig_receita_line = px.line(
-                    df_receita,
-                    x="ANO",
-                    y=coluna_valor_receita,
-                    title="Evolução da Receita Própria (Linha)",
-                    markers=True,
-                    template=tema_grafico
-                )
-                
-                fig_receita_line.update_layout(
-                    height=400,
-                    title_x=0.5,
-                    yaxis=dict(
-                        tickformat=".2f",
-                        tickprefix="R$ ",
-                        separatethousands=True,
-                    )
-                )
-                
-                st.plotly_chart(fig_receita_line, use_container_width=True)
-                
-                # Tabela de dados
-                st.markdown("### 📋 Dados Detalhados - Receita Própria")
-                df_receita_formatado = df_receita.copy()
-                df_receita_formatado[coluna_valor_receita] = df_receita_formatado[coluna_valor_receita].apply(formatar_moeda_br)
-                
-                st.dataframe(
-                    df_receita_formatado,
-                    use_container_width=True,
-                    hide_index=True
-                )
-    
-    except FileNotFoundError:
-        st.warning("📁 O arquivo 'Receita Propria Consolidado.xlsx' não foi encontrado.")
-    except Exception as e:
-        st.error(f"❌ Erro ao carregar dados de receita própria: {e}")
-
-# ========== ABA 3: EVOLUÇÃO ARRECADAÇÃO ==========
-with tab3:
-    st.markdown("## 📈 Evolução Arrecadação")
-    
-    # Informações sobre o arquivo fonte
-    st.markdown("### 📁 Arquivo Fonte dos Dados")
-    col_info1, col_info2 = st.columns([2, 1])
-    
-    with col_info1:
-        st.info("""
-        **📊 Fonte:** `Evolucao Arrecadacao.xlsx`
-        
-        **📋 Descrição:** Dados detalhados de evolução mensal da arrecadação, 
-        contendo orçado, arrecadado e metas por tributo e mês.
-        
-        **📅 Período:** Dados mensais organizados por ano em abas separadas
-        **📊 Métricas:** Orçado, Arrecadado, Meta, Superávit/Déficit
-        """)
-    
-    with col_info2:
-        # Verificar se o arquivo existe e mostrar informações
-        try:
-            import os
-            arquivo_info = "Evolucao Arrecadacao.xlsx"
-            if os.path.exists(arquivo_info):
-                stat_info = os.stat(arquivo_info)
-                tamanho_mb = stat_info.st_size / (1024 * 1024)
-                data_modificacao = datetime.fromtimestamp(stat_info.st_mtime)
-                
-                st.success(f"""
-                ✅ **Arquivo encontrado**
-                
-                📏 **Tamanho:** {tamanho_mb:.2f} MB
-                📅 **Última modificação:** {data_modificacao.strftime('%d/%m/%Y %H:%M')}
-                """)
-            else:
-                st.error("❌ Arquivo não encontrado")
-        except Exception as e:
-            st.warning(f"⚠️ Erro ao verificar arquivo: {e}")
-    
-    st.markdown("---")
-    
-    # Botão para download do arquivo original
-    st.markdown("### 💾 Download do Arquivo Original")
-    try:
-        with open("Evolucao Arrecadacao.xlsx", "rb") as file:
-            st.download_button(
-                label="📥 Download Evolucao Arrecadacao.xlsx",
-                data=file.read(),
-                file_name="Evolucao Arrecadacao.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-    except FileNotFoundError:
-        st.warning("⚠️ Arquivo não disponível para download")
-    except Exception as e:
-        st.error(f"❌ Erro ao preparar download: {e}")
-    
-    st.markdown("---")
-    
-    # Informação sobre o cálculo de superávit/déficit
-    st.info("""
-    💡 **Cálculo de Superávit/Déficit:** 
-    - **Superávit:** Quando ARRECADADO > ORÇADO (valor positivo)
-    - **Déficit:** Quando ARRECADADO < ORÇADO (valor negativo)
-    - **Fórmula:** SALDO = ARRECADADO - ORÇADO
-    """)
-    
-    # Mostrar filtros globais aplicados
-    if anos_selecionados or tributos_selecionados or meses_selecionados:
-        st.markdown("### 🔍 Filtros Globais Aplicados")
-        col_filtro1, col_filtro2, col_filtro3 = st.columns(3)
-        
-        with col_filtro1:
-            if anos_selecionados:
-                st.info(f"📅 **Anos selecionados:** {', '.join(anos_selecionados)}")
-        
-        with col_filtro2:
-            if tributos_selecionados:
-                st.info(f"🏛️ **Tributos selecionados:** {', '.join(tributos_selecionados)}")
-        
-        with col_filtro3:
-            if meses_selecionados:
-                st.info(f"📅 **Meses selecionados:** {', '.join(meses_selecionados)}")
-    
-    try:
-        # Carregar dados de evolução
-        xl = pd.ExcelFile('Evolucao Arrecadacao.xlsx')
-        anos_disponiveis_evolucao = xl.sheet_names
-        
-        # Verificar se há abas no arquivo
-        if not anos_disponiveis_evolucao:
-            st.error("❌ O arquivo 'Evolucao Arrecadacao.xlsx' não possui abas.")
-            st.stop()
-        
-        st.success(f"✅ Arquivo carregado com sucesso! Encontradas {len(anos_disponiveis_evolucao)} abas: {', '.join(anos_disponiveis_evolucao)}")
-        
-        # Mostrar prévia dos dados
-        st.markdown("### 👀 Prévia dos Dados")
-        st.info(f"""
-        **📊 Estrutura do arquivo:**
-        - **Total de abas:** {len(anos_disponiveis_evolucao)} anos
-        - **Abas disponíveis:** {', '.join(anos_disponiveis_evolucao)}
-        - **Formato:** Dados mensais organizados por ano
-        """)
-        
-        # Mostrar prévia da primeira aba
-        if anos_disponiveis_evolucao:
-            try:
-                df_previa = pd.read_excel('Evolucao Arrecadacao.xlsx', sheet_name=anos_disponiveis_evolucao[0])
-                # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
-                df_previa.columns = df_previa.columns.astype(str)
-                with st.expander(f"📋 Ver primeiras linhas da aba '{anos_disponiveis_evolucao[0]}'", expanded=False):
-                    st.dataframe(df_previa.head(10), use_container_width=True)
-            except Exception as e:
-                st.warning(f"⚠️ Não foi possível mostrar prévia da aba {anos_disponiveis_evolucao[0]}: {e}")
-        
-        # Usar filtros globais se disponíveis, senão usar todos os anos
-        # Filtrar apenas anos que existem no arquivo de evolução
-        anos_evolucao_selecionados = [ano for ano in (anos_selecionados if anos_selecionados else anos_disponiveis_evolucao) if ano in anos_disponiveis_evolucao]
-        
-        if not anos_evolucao_selecionados:
-            st.warning("⚠️ Nenhum dos anos selecionados globalmente existe no arquivo de evolução.")
-            anos_evolucao_selecionados = anos_disponiveis_evolucao
+            **📅 Período:** Dados históricos de receita própria por ano
+            **💰 Tipo:** Receitas próprias consolidadas do município
+            """)
         
-        # Carregar um ano para obter os tributos disponíveis
-        tributos_evolucao = []
-        if anos_evolucao_selecionados:
+        with col_info2:
+            # Verificar se o arquivo existe e mostrar informações
             try:
-                df_temp = pd.read_excel('Evolucao Arrecadacao.xlsx', sheet_name=anos_evolucao_selecionados[0])
-                # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
-                df_temp.columns = df_temp.columns.astype(str)
-                
-                # Verificar se a coluna existe (pode ser 'TRIBUTO/MÊS/ANO' ou 'TRIBUTO')
-                coluna_tributo = None
-                if 'TRIBUTO/MÊS/ANO' in df_temp.columns:
-                    coluna_tributo = 'TRIBUTO/MÊS/ANO'
-                elif 'TRIBUTO' in df_temp.columns:
-                    coluna_tributo = 'TRIBUTO'
-                
-                if coluna_tributo:
-                    tributos_evolucao = df_temp[coluna_tributo].unique().tolist()
-                    st.success(f"✅ Encontrados {len(tributos_evolucao)} tributos na aba {anos_evolucao_selecionados[0]} (coluna: {coluna_tributo})")
+                import os
+                arquivo_info = "Receita Propria Consolidado.xlsx"
+                if os.path.exists(arquivo_info):
+                    stat_info = os.stat(arquivo_info)
+                    tamanho_mb = stat_info.st_size / (1024 * 1024)
+                    data_modificacao = datetime.fromtimestamp(stat_info.st_mtime)
+                    
+                    st.success(f"""
+                    ✅ **Arquivo encontrado**
+                    
+                    📏 **Tamanho:** {tamanho_mb:.2f} MB
+                    📅 **Última modificação:** {data_modificacao.strftime('%d/%m/%Y %H:%M')}
+                    """)
                 else:
-                    st.error(f"❌ Coluna de tributo não encontrada na aba {anos_evolucao_selecionados[0]}")
-                    st.write("Colunas disponíveis:", list(df_temp.columns))
+                    st.error("❌ Arquivo não encontrado")
             except Exception as e:
-                st.error(f"❌ Erro ao carregar aba {anos_evolucao_selecionados[0]}: {e}")
+                st.warning(f"⚠️ Erro ao verificar arquivo: {e}")
         
-        # Usar filtros globais de tributos se disponíveis, senão usar todos os tributos
-        tributos_evolucao_selecionados = tributos_selecionados if tributos_selecionados else tributos_evolucao
+        st.markdown("---")
         
-        # Mapear meses selecionados para números
-        meses_para_numero = {
-            "Janeiro": 1, "Fevereiro": 2, "Março": 3, "Abril": 4, "Maio": 5, "Junho": 6,
-            "Julho": 7, "Agosto": 8, "Setembro": 9, "Outubro": 10, "Novembro": 11, "Dezembro": 12
-        }
+        # Botão para download do arquivo original
+        st.markdown("### 💾 Download do Arquivo Original")
+        botao_download_original("Receita Propria Consolidado.xlsx")
         
-        # Usar filtros globais de meses se disponíveis, senão usar todos os meses
-        meses_evolucao_selecionados = [meses_para_numero[mes] for mes in meses_selecionados] if meses_selecionados else list(range(1, 13))
+        st.markdown("---")
         
-        if not anos_evolucao_selecionados:
-            st.warning("⚠️ Nenhum ano selecionado para análise.")
-        else:
-            # Carregar e processar dados
-            dados_evolucao = []
-            erros_processamento = []
-            
-            for ano in anos_evolucao_selecionados:
-                try:
-                    df_ano = pd.read_excel('Evolucao Arrecadacao.xlsx', sheet_name=ano)
-                    # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
-                    df_ano.columns = df_ano.columns.astype(str)
-                    
-                    # Verificar se a coluna necessária existe (pode ser 'TRIBUTO/MÊS/ANO' ou 'TRIBUTO')
-                    coluna_tributo = None
-                    if 'TRIBUTO/MÊS/ANO' in df_ano.columns:
-                        coluna_tributo = 'TRIBUTO/MÊS/ANO'
-                    elif 'TRIBUTO' in df_ano.columns:
-                        coluna_tributo = 'TRIBUTO'
-                    
-                    if not coluna_tributo:
-                        erros_processamento.append(f"Coluna de tributo não encontrada na aba {ano}")
-                        continue
-                    
-                    # Filtrar tributos selecionados
-                    if tributos_evolucao_selecionados:
-                        df_ano = df_ano[df_ano[coluna_tributo].isin(tributos_evolucao_selecionados)]
-                    
-                    # Verificar se há dados após filtro
-                    if df_ano.empty:
-                        erros_processamento.append(f"Nenhum dado encontrado na aba {ano} após aplicar filtros")
-                        continue
-                    
-                    # Processar dados mensais
-                    for _, row in df_ano.iterrows():
-                        tributo = row[coluna_tributo]
-                        
-                        # Verificar se as colunas necessárias existem
-                        colunas_necessarias = ['ORÇADO', 'ARRECADADO', 'META']
-                        if not all(col in df_ano.columns for col in colunas_necessarias):
-                            erros_processamento.append(f"Colunas necessárias não encontradas na aba {ano}")
-                            continue
-                        
-                        # Processar colunas de meses (colunas 1-12) - apenas meses selecionados
-                        for i in meses_evolucao_selecionados:
-                            if i < len(df_ano.columns):
-                                col_mes = df_ano.columns[i]
-                                if pd.notna(row[col_mes]) and row[col_mes] != 0:
-                                    try:
-                                        # Calcular superávit/déficit usando a fórmula ARRECADADO - ORÇADO
-                                        saldo = row['ARRECADADO'] - row['ORÇADO']
-                                        superavit = saldo if saldo > 0 else 0
-                                        deficit = abs(saldo) if saldo < 0 else 0
-                                        
-                                        dados_evolucao.append({
-                                            'ANO': ano,
-                                            'TRIBUTO': tributo,
-                                            'MES': i,
-                                            'NOME_MES': list(meses_para_numero.keys())[list(meses_para_numero.values()).index(i)],
-                                            'VALOR_MENSAL': row[col_mes],
-                                            'ORCADO': row['ORÇADO'],
-                                            'ARRECADADO': row['ARRECADADO'],
-                                            'META': row['META'],
-                                            'SALDO': saldo,
-                                            'SUPERAVIT': superavit,
-                                            'DEFICIT': deficit
-                                        })
-                                    except Exception as e:
-                                        erros_processamento.append(f"Erro ao processar linha do tributo {tributo} na aba {ano}: {e}")
-                
-                except Exception as e:
-                    erros_processamento.append(f"Erro ao carregar aba {ano}: {e}")
-            
-            # Mostrar erros se houver
-            if erros_processamento:
-                st.warning("⚠️ Alguns erros foram encontrados durante o processamento:")
-                for erro in erros_processamento[:5]:  # Mostrar apenas os primeiros 5 erros
-                    st.write(f"• {erro}")
-                if len(erros_processamento) > 5:
-                    st.write(f"• ... e mais {len(erros_processamento) - 5} erros")
-            
-            if dados_evolucao:
-                df_evolucao = pd.DataFrame(dados_evolucao)
-                st.success(f"✅ Processados {len(dados_evolucao)} registros de dados")
-                
-                # Métricas principais
-                st.markdown("### 📊 Métricas Principais")
-                
-                # Calcular métricas para todos os anos selecionados (não apenas o último)
-                # Somatória total dos valores mensais para todos os anos selecionados
-                total_valor_mensal = df_evolucao['VALOR_MENSAL'].sum()
-                
-                # Calcular orçado e arrecadado totais para todos os anos selecionados
-                df_orcado_arrecadado = df_evolucao.groupby(['ANO', 'TRIBUTO']).agg({
-                    'ORCADO': 'first',      # Pegar apenas uma vez por tributo/ano
-                    'ARRECADADO': 'first'   # Pegar apenas uma vez por tributo/ano
-                }).reset_index()
-                
-                # Somar orçado e arrecadado para todos os anos selecionados
-                total_orcado = df_orcado_arrecadado['ORCADO'].sum()
-                total_arrecadado = df_orcado_arrecadado['ARRECADADO'].sum()
-                
-                # Layout de métricas
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <div class="metric-value">{formatar_moeda_br(total_arrecadado)}</div>
-                        <div class="metric-label">Arrecadado</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col2:
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <div class="metric-value">{formatar_moeda_br(total_orcado)}</div>
-                        <div class="metric-label">Orçado</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col3:
-                    meta_alcancada = (total_arrecadado / total_orcado * 100) if total_orcado > 0 else 0
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <div class="metric-value">{meta_alcancada:.1f}%</div>
-                        <div class="metric-label">Meta Atingida</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col4:
-                    superavit_deficit = total_arrecadado - total_orcado
-                    status = "SUPERÁVIT" if superavit_deficit > 0 else "DÉFICIT"
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <div class="metric-value">{formatar_moeda_br(abs(superavit_deficit))}</div>
-                        <div class="metric-label">{status}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Gráficos de evolução
-                st.markdown("### 📈 Análise Temporal")
-                
-                # Gráfico 1: Evolução mensal por tributo
-                col_evol1, col_evol2 = st.columns(2)
+        try:
+            # Carregar dados de receita própria
+            df_receita = carregar_dados("Receita Propria Consolidado.xlsx")
+            
+            # Mostrar prévia dos dados
+            if df_receita is not None and not df_receita.empty:
+                st.markdown("### 👀 Prévia dos Dados")
+                st.info(f"""
+                **📊 Estrutura dos dados:**
+                - **Linhas:** {len(df_receita)} registros
+                - **Colunas:** {len(df_receita.columns)} campos
+                - **Colunas disponíveis:** {', '.join(df_receita.columns.tolist())}
+                """)
                 
-                with col_evol1:
-                    # Gráfico de linha para evolução mensal
-                    # Preparar dados com ordenação correta dos meses
-                    df_evol_mensal = df_evolucao.copy()
+                # Mostrar primeiras linhas dos dados
+                with st.expander("📋 Ver primeiras linhas dos dados", expanded=False):
+                    st.dataframe(df_receita.head(10), width="stretch")
+            else:
+                st.warning("⚠️ Não foi possível carregar os dados para mostrar a prévia")
+            
+            if df_receita is None:
+                st.error("Não foi possível carregar os dados de receita própria.")
+            else:
+                # Mostrar filtros aplicados
+                if anos_selecionados:
+                    st.info(f"📅 **Anos selecionados:** {', '.join(anos_selecionados)}")
+                
+                # Filtrar por anos selecionados (filtro global)
+                if anos_selecionados:
+                    df_receita = df_receita[df_receita["ANO"].isin(anos_selecionados)]
+                
+                # Verificar se há dados após filtros
+                if df_receita.empty:
+                    st.warning("⚠️ Nenhum dado encontrado com os filtros aplicados. Tente ajustar os filtros na sidebar.")
+                elif "ANO" not in df_receita.columns:
+                    st.error("A coluna 'ANO' não foi encontrada no arquivo 'Receita Propria Consolidado.xlsx'.")
+                else:
+                    coluna_valor_receita = [col for col in df_receita.columns if col != "ANO"][0]
                     
-                    # Criar mapeamento de meses para ordenação
-                    ordem_meses = {
-                        "Janeiro": 1, "Fevereiro": 2, "Março": 3, "Abril": 4, "Maio": 5, "Junho": 6,
-                        "Julho": 7, "Agosto": 8, "Setembro": 9, "Outubro": 10, "Novembro": 11, "Dezembro": 12
-                    }
+                    # Métricas de receita própria
+                    # Ordenar uma única vez por ano e ler último/penúltimo por posição
+                    df_receita_por_ano = df_receita.sort_values("ANO")
+                    anos_receita = df_receita_por_ano["ANO"].to_numpy()
+                    valores_receita = df_receita_por_ano[coluna_valor_receita].to_numpy()
                     
-                    # Adicionar coluna de ordenação
-                    df_evol_mensal['ORDEM_MES'] = df_evol_mensal['NOME_MES'].map(ordem_meses)
+                    (ultimo_ano_receita, penultimo_ano_receita, ultimo_valor_receita,
+                     penultimo_valor_receita, crescimento_receita) = metricas_anuais(anos_receita, valores_receita)
+                    media_receita = df_receita[coluna_valor_receita].mean()
                     
-                    # Ordenar por tributo, ano e ordem do mês
-                    df_evol_mensal = df_evol_mensal.sort_values(['TRIBUTO', 'ANO', 'ORDEM_MES'])
+                    # Layout de métricas
+                    col1, col2, col3, col4 = st.columns(4)
                     
-                    fig_evol_mensal = px.line(
-                        df_evol_mensal,
-                        x='NOME_MES',
-                        y='VALOR_MENSAL',
-                        color='TRIBUTO',
-                        title='Evolução Mensal por Tributo',
-                        template=tema_grafico
-                    )
+                    with col1:
+                        st.markdown(f"""
+                        <div class="metric-card">
+                            <div class="metric-value">{formatar_moeda_br(ultimo_valor_receita)}</div>
+                            <div class="metric-label">Receita {ultimo_ano_receita}</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                     
-                    fig_evol_mensal.update_layout(
-                        height=400,
-                        title_x=0.5,
-                        yaxis=dict(
-                            tickformat=".2f",
-                            tickprefix="R$ ",
-                            separatethousands=True,
-                        )
-                    )
+                    with col2:
+                        st.markdown(f"""
+                        <div class="metric-card">
+                            <div class="metric-value">{formatar_moeda_br(penultimo_valor_receita)}</div>
+                            <div class="metric-label">Receita {penultimo_ano_receita}</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                     
-                    st.plotly_chart(fig_evol_mensal, use_container_width=True)
-                
-                with col_evol2:
-                    # Gráfico de barras para comparação orçado vs arrecadado
-                    df_comparacao = df_evolucao.groupby(['ANO', 'TRIBUTO']).agg({
-                        'ORCADO': 'first',
-                        'ARRECADADO': 'first'
-                    }).reset_index()
+                    with col3:
+                        st.markdown(f"""
+                        <div class="metric-card">
+                            <div class="metric-value">{crescimento_receita:.1f}%</div>
+                            <div class="metric-label">Crescimento Receita</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                     
-                    # Criar gráfico de barras agrupadas
-                    fig_comparacao = go.Figure()
+                    with col4:
+                        st.markdown(f"""
+                        <div class="metric-card">
+                            <div class="metric-value">{formatar_moeda_br(media_receita)}</div>
+                            <div class="metric-label">Média Anual Receita</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                     
-                    for tributo in df_comparacao['TRIBUTO'].unique():
-                        df_tributo = df_comparacao[df_comparacao['TRIBUTO'] == tributo]
-                        
-                        # Barras para orçado
-                        fig_comparacao.add_trace(go.Bar(
-                            name=f'{tributo} - Orçado',
-                            x=df_tributo['ANO'],
-                            y=df_tributo['ORCADO'],
-                            marker_color='lightblue',
-                            opacity=0.7
-                        ))
-                        
-                        # Barras para arrecadado
-                        fig_comparacao.add_trace(go.Bar(
-                            name=f'{tributo} - Arrecadado',
-                            x=df_tributo['ANO'],
-                            y=df_tributo['ARRECADADO'],
-                            marker_color='darkblue',
-                            opacity=0.9
-                        ))
+                    # Gráficos de receita própria
+                    # Rótulos das barras apenas quando há poucas barras
+                    if len(df_receita) <= LIMITE_ROTULOS_BARRAS:
+                        df_receita["TEXTO_FORMATADO"] = formatar_moeda_br_serie(df_receita[coluna_valor_receita])
                     
-                    fig_comparacao.update_layout(
-                        title='Orçado vs Arrecadado por Tributo e Ano',
-                        barmode='group',
-                        height=400,
-                        template=tema_grafico,
-                        title_x=0.5,
-                        yaxis=dict(
-                            tickformat=".2f",
-                            tickprefix="R$ ",
-                            separatethousands=True,
-                        )
-                    )
+                    graficos_receita = montar_graficos_receita(df_receita, coluna_valor_receita, tema_grafico)
                     
-                    st.plotly_chart(fig_comparacao, use_container_width=True)
-                
-                # Gráfico comparativo entre anos
-                st.markdown("### 🔍 Comparativo Entre Anos")
-                
-                # Criar gráfico comparativo por mês entre anos
-                # Preparar dados com ordenação correta dos meses
-                df_comparativo = df_evolucao.groupby(['ANO', 'NOME_MES'])['VALOR_MENSAL'].sum().reset_index()
-                
-                # Criar mapeamento de meses para ordenação
-                ordem_meses = {
-                    "Janeiro": 1, "Fevereiro": 2, "Março": 3, "Abril": 4, "Maio": 5, "Junho": 6,
-                    "Julho": 7, "Agosto": 8, "Setembro": 9, "Outubro": 10, "Novembro": 11, "Dezembro": 12
-                }
-                
-                # Adicionar coluna de ordenação
-                df_comparativo['ORDEM_MES'] = df_comparativo['NOME_MES'].map(ordem_meses)
-                
-                # Ordenar por ano e ordem do mês
-                df_comparativo = df_comparativo.sort_values(['ANO', 'ORDEM_MES'])
-                
-                fig_comparativo_anos = px.line(
-                    df_comparativo,
-                    x='NOME_MES',
-                    y='VALOR_MENSAL',
-                    color='ANO',
-                    title='Comparativo de Arrecadação Mensal Entre Anos',
-                    template=tema_grafico
-                )
-                
-                fig_comparativo_anos.update_layout(
-                    height=500,
-                    title_x=0.5,
-                    yaxis=dict(
-                        tickformat=".2f",
-                        tickprefix="R$ ",
-                        separatethousands=True,
-                    ),
-                    xaxis_title="Mês",
-                    yaxis_title="Valor Total (R$)"
-                )
-                
-                st.plotly_chart(fig_comparativo_anos, use_container_width=True)
-                
-                # Gráfico de barras comparativo por tributo entre anos
-                fig_comparativo_tributos = px.bar(
-                    df_evolucao.groupby(['ANO', 'TRIBUTO'])['VALOR_MENSAL'].sum().reset_index(),
-                    x='TRIBUTO',
-                    y='VALOR_MENSAL',
-                    color='ANO',
-                    title='Comparativo de Arrecadação por Tributo Entre Anos',
-                    template=tema_grafico,
-                    barmode='group'
-                )
-                
-                fig_comparativo_tributos.update_layout(
-                    height=500,
-                    title_x=0.5,
-                    yaxis=dict(
-                        tickformat=".2f",
-                        tickprefix="R$ ",
-                        separatethousands=True,
-                    ),
-                    xaxis_title="Tributo",
-                    yaxis_title="Valor Total (R$)"
-                )
-                
-                st.plotly_chart(fig_comparativo_tributos, use_container_width=True)
-                
-                # Gráfico 2: Análise de metas
-                st.markdown("### 🎯 Análise de Metas")
-                
-                # Calcular percentual de meta por tributo e ano
-                df_metas = df_evolucao.groupby(['ANO', 'TRIBUTO']).agg({
-                    'META': 'first'
-                }).reset_index()
-                
-                fig_metas = px.bar(
-                    df_metas,
-                    x='ANO',
-                    y='META',
-                    color='TRIBUTO',
-                    title='Percentual de Meta Atingida por Tributo',
-                    template=tema_grafico
-                )
-                
-                fig_metas.update_layout(
-                    height=400,
-                    title_x=0.5,
-                    yaxis=dict(
-                        tickformat=".1f",
-                        ticksuffix="%",
-                        title="Meta (%)"
-                    )
-                )
-                
-                st.plotly_chart(fig_metas, use_container_width=True)
-                
-                # Gráfico 3: Análise de superávit/déficit
-                st.markdown("### 💰 Análise de Superávit/Déficit")
-                
-                # Calcular superávit/déficit por tributo e ano usando a fórmula ARRECADADO - ORÇADO
-                df_superavit = df_evolucao.groupby(['ANO', 'TRIBUTO']).agg({
-                    'ARRECADADO': 'first',
-                    'ORCADO': 'first',
-                    'SALDO': 'first'
-                }).reset_index()
-                
-                # Calcular status baseado no saldo
-                df_superavit['STATUS'] = df_superavit['SALDO'].apply(lambda x: 'SUPERÁVIT' if x > 0 else 'DÉFICIT')
-                
-                # Criar gráfico com cores diferentes para superávit e déficit
-                fig_superavit = go.Figure()
-                
-                for tributo in df_superavit['TRIBUTO'].unique():
-                    df_tributo = df_superavit[df_superavit['TRIBUTO'] == tributo]
+                    col_receita1, col_receita2 = st.columns(2)
                     
-                    # Separar superávit e déficit
-                    superavit_data = df_tributo[df_tributo['SALDO'] > 0]
-                    deficit_data = df_tributo[df_tributo['SALDO'] < 0]
+                    with col_receita1:
+                        # Gráfico de barras
+                        st.plotly_chart(graficos_receita["barras"], width="stretch")
                     
-                    # Adicionar barras de superávit (verde)
-                    if not superavit_data.empty:
-                        fig_superavit.add_trace(go.Bar(
-                            name=f'{tributo} - Superávit',
-                            x=superavit_data['ANO'],
-                            y=superavit_data['SALDO'],
-                            marker_color='green',
-                            opacity=0.8,
-                            showlegend=True
-                        ))
+                    with col_receita2:
+                        # Gráfico de área
+                        st.plotly_chart(graficos_receita["area"], width="stretch")
                     
-                    # Adicionar barras de déficit (vermelho)
-                    if not deficit_data.empty:
-                        fig_superavit.add_trace(go.Bar(
-                            name=f'{tributo} - Déficit',
-                            x=deficit_data['ANO'],
-                            y=deficit_data['SALDO'],
-                            marker_color='red',
-                            opacity=0.8,
-                            showlegend=True
-                        ))
-                
-                fig_superavit.update_layout(
-                    title='Superávit/Déficit por Tributo e Ano (ARRECADADO - ORÇADO)',
-                    height=400,
-                    template=tema_grafico,
-                    title_x=0.5,
-                    yaxis=dict(
-                        tickformat=".2f",
-                        tickprefix="R$ ",
-                        separatethousands=True,
-                        title="Saldo (R$)"
-                    ),
-                    barmode='group'
-                )
-                
-                # Adicionar linha de referência em zero
-                fig_superavit.add_hline(y=0, line_dash="dash", line_color="black", line_width=2)
-                
-                st.plotly_chart(fig_superavit, use_container_width=True)
-                
-                # Análise detalhada de superávit/déficit
-                st.markdown("### 📊 Análise Detalhada de Superávit/Déficit")
-                
-                # Criar métricas por status
-                col_analise1, col_analise2, col_analise3 = st.columns(3)
-                
-                with col_analise1:
-                    total_superavit = df_superavit[df_superavit['SALDO'] > 0]['SALDO'].sum()
-                    st.metric(
-                        label="💰 Total Superávit",
-                        value=formatar_moeda_br(total_superavit),
-                        delta=f"{len(df_superavit[df_superavit['SALDO'] > 0])} registros"
-                    )
-                
-                with col_analise2:
-                    total_deficit = abs(df_superavit[df_superavit['SALDO'] < 0]['SALDO'].sum())
-                    st.metric(
-                        label="📉 Total Déficit",
-                        value=formatar_moeda_br(total_deficit),
-                        delta=f"{len(df_superavit[df_superavit['SALDO'] < 0])} registros"
-                    )
-                
-                with col_analise3:
-                    saldo_geral = df_superavit['SALDO'].sum()
-                    st.metric(
-                        label="⚖️ Saldo Geral",
-                        value=formatar_moeda_br(saldo_geral),
-                        delta="Superávit" if saldo_geral > 0 else "Déficit"
+                    # Gráfico de linha
+                    st.markdown("### 📈 Evolução Temporal")
+                    st.plotly_chart(graficos_receita["linha"], width="stretch")
+                    
+                    # Tabela de dados
+                    st.markdown("### 📋 Dados Detalhados - Receita Própria")
+                    st.dataframe(
+                        tabela_formatada_br(df_receita, [coluna_valor_receita]),
+                        width="stretch",
+                        hide_index=True
                     )
-                
-                # Tabela de dados consolidados
-                st.markdown("### 📋 Dados Consolidados")
-                
-                # Criar tabela consolidada usando a fórmula ARRECADADO - ORÇADO
-                df_consolidado = df_evolucao.groupby(['ANO', 'TRIBUTO']).agg({
-                    'ORCADO': 'first',
-                    'ARRECADADO': 'first',
-                    'META': 'first',
-                    'SALDO': 'first'
-                }).reset_index()
-                
-                # Calcular status baseado no saldo
-                df_consolidado['STATUS'] = df_consolidado['SALDO'].apply(lambda x: 'SUPERÁVIT' if x > 0 else 'DÉFICIT')
-                
-                # Adicionar coluna de percentual de realização
-                df_consolidado['PERCENTUAL_REALIZACAO'] = (df_consolidado['ARRECADADO'] / df_consolidado['ORCADO'] * 100).round(1)
-                
-                # Formatar dados para exibição
-                df_consolidado_formatado = df_consolidado.copy()
-                df_consolidado_formatado['ORCADO'] = df_consolidado_formatado['ORCADO'].apply(formatar_moeda_br)
-                df_consolidado_formatado['ARRECADADO'] = df_consolidado_formatado['ARRECADADO'].apply(formatar_moeda_br)
-                df_consolidado_formatado['META'] = df_consolidado_formatado['META'].apply(lambda x: f"{x:.1f}%")
-                df_consolidado_formatado['SALDO'] = df_consolidado_formatado['SALDO'].apply(formatar_moeda_br)
-                df_consolidado_formatado['PERCENTUAL_REALIZACAO'] = df_consolidado_formatado['PERCENTUAL_REALIZACAO'].apply(lambda x: f"{x:.1f}%")
-                
-                # Selecionar colunas para exibição
-                colunas_exibicao = ['ANO', 'TRIBUTO', 'ORCADO', 'ARRECADADO', 'PERCENTUAL_REALIZACAO', 'META', 'SALDO', 'STATUS']
-                df_exibicao = df_consolidado_formatado[colunas_exibicao]
-                
-                # Explicação das colunas da tabela
-                st.markdown("""
-                **📋 Legenda da Tabela:**
-                - **ANO:** Ano de referência
-                - **TRIBUTO:** Tipo de tributo
-                - **ORÇADO:** Valor orçado para o ano
-                - **ARRECADADO:** Valor efetivamente arrecadado
-                - **% REALIZAÇÃO:** Percentual de realização (ARRECADADO/ORÇADO × 100)
-                - **META:** Meta estabelecida (%)
-                - **SALDO:** Saldo calculado (ARRECADADO - ORÇADO)
-                - **STATUS:** Superávit (saldo > 0) ou Déficit (saldo < 0)
-                """)
-                
-                st.dataframe(
-                    df_exibicao,
-                    use_container_width=True,
-                    hide_index=True
-                )
-                
-                # Download dos dados
-                st.markdown("### 💾 Download dos Dados")
-                
-                # Preparar dados para download
-                df_download = df_consolidado.copy()
-                df_download['ORCADO'] = df_download['ORCADO'].apply(lambda x: f"R$ {x:,.2f}")
-                df_download['ARRECADADO'] = df_download['ARRECADADO'].apply(lambda x: f"R$ {x:,.2f}")
-                df_download['META'] = df_download['META'].apply(lambda x: f"{x:.1f}%")
-                df_download['SALDO'] = df_download['SALDO'].apply(lambda x: f"R$ {x:,.2f}")
-                df_download['PERCENTUAL_REALIZACAO'] = df_download['PERCENTUAL_REALIZACAO'].apply(lambda x: f"{x:.1f}%")
-                
-                # Criar arquivo CSV para download
-                csv = df_download.to_csv(index=False, encoding='utf-8-sig')
-                st.download_button(
-                    label="📥 Download CSV",
-                    data=csv,
-                    file_name=f"evolucao_arrecadacao_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                    mime="text/csv"
-                )
-            else:
-                st.warning("⚠️ Nenhum dado encontrado com os filtros aplicados.")
-                if erros_processamento:
-                    st.error("❌ Verifique os erros acima para entender por que nenhum dado foi processado.")
+        
+        except Exception as e:
+            st.error(f"❌ Erro ao carregar dados de receita própria: {e}")
+
+# ========== FUNÇÃO PARA MONTAR OS DADOS MENSAIS ==========
+# Resultado em cache por arquivo (data de modificação) e filtros selecionados;
+# os filtros chegam como tuplas ordenadas para reaproveitar o cache
+@st.cache_data(show_spinner=False, max_entries=MAX_ENTRADAS_CACHE)
+def montar_dados_mensais(arquivo, mtime, anos, tributos, meses):
+    abas_arquivo = carregar_abas(arquivo, mtime)
+    partes_mensais = []
+    erros_processamento = []
+    numero_para_mes = dict(enumerate(meses_disponiveis, start=1))
     
-    except FileNotFoundError:
-        st.warning("📁 O arquivo 'Evolucao Arrecadacao.xlsx' não foi encontrado.")
-    except Exception as e:
-        st.error(f"❌ Erro ao carregar dados de evolução: {e}")
-        st.write("Detalhes do erro:", str(e))
+    for ano in anos:
+        try:
+            df_ano = abas_arquivo[ano]
+            # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
+            df_ano.columns = df_ano.columns.astype(str)
+            
+            # Verificar se a coluna necessária existe (pode ser 'TRIBUTO/MÊS/ANO' ou 'TRIBUTO')
+            coluna_tributo = None
+            if 'TRIBUTO/MÊS/ANO' in df_ano.columns:
+                coluna_tributo = 'TRIBUTO/MÊS/ANO'
+            elif 'TRIBUTO' in df_ano.columns:
+                coluna_tributo = 'TRIBUTO'
+            
+            if not coluna_tributo:
+                erros_processamento.append(f"Coluna de tributo não encontrada na aba {ano}")
+                continue
+            
+            # Filtrar tributos selecionados
+            if tributos:
+                df_ano = df_ano[df_ano[coluna_tributo].isin(tributos)]
+            
+            # Verificar se há dados após filtro
+            if df_ano.empty:
+                erros_processamento.append(f"Nenhum dado encontrado na aba {ano} após aplicar filtros")
+                continue
+            
+            # Verificar se as colunas necessárias existem
+            colunas_necessarias = ['ORÇADO', 'ARRECADADO', 'META']
+            if not all(col in df_ano.columns for col in colunas_necessarias):
+                erros_processamento.append(f"Colunas necessárias não encontradas na aba {ano}")
+                continue
+            
+            # Colunas de meses (colunas 1-12) - apenas meses selecionados
+            colunas_meses = {df_ano.columns[i]: i for i in meses if i < len(df_ano.columns)}
+            
+            # Transformar os meses em linhas (formato longo) de uma só vez
+            df_longo = df_ano.melt(
+                id_vars=[coluna_tributo] + colunas_necessarias,
+                value_vars=list(colunas_meses),
+                var_name='COLUNA_MES',
+                value_name='VALOR_MENSAL',
+                ignore_index=False
+            )
+            df_longo = df_longo[df_longo['VALOR_MENSAL'].notna() & (df_longo['VALOR_MENSAL'] != 0)]
+            # Manter a ordem original: linha da planilha e, dentro dela, o mês
+            df_longo = df_longo.sort_index(kind='stable').reset_index(drop=True)
+            
+            # Calcular superávit/déficit usando a fórmula ARRECADADO - ORÇADO
+            saldo = df_longo['ARRECADADO'] - df_longo['ORÇADO']
+            # Número do mês cabe em int8; valores monetários seguem em float64,
+            # float32 perderia os centavos na casa das centenas de milhões
+            mes = df_longo['COLUNA_MES'].map(colunas_meses).astype('int8')
+            
+            partes_mensais.append(pd.DataFrame({
+                'ANO': ano,
+                'TRIBUTO': df_longo[coluna_tributo],
+                'MES': mes,
+                'NOME_MES': mes.map(numero_para_mes),
+                'VALOR_MENSAL': df_longo['VALOR_MENSAL'],
+                'ORCADO': df_longo['ORÇADO'],
+                'ARRECADADO': df_longo['ARRECADADO'],
+                'META': df_longo['META'],
+                'SALDO': saldo,
+                'SUPERAVIT': saldo.where(saldo > 0, 0),
+                'DEFICIT': (-saldo).where(saldo < 0, 0)
+            }))
+        
+        except Exception as e:
+            erros_processamento.append(f"Erro ao carregar aba {ano}: {e}")
+    
+    if partes_mensais:
+        df_mensal = pd.concat(partes_mensais, ignore_index=True)
+        # Chaves de agrupamento como categorias: groupby/sort trabalham com códigos inteiros
+        df_mensal['ANO'] = df_mensal['ANO'].astype('category')
+        df_mensal['TRIBUTO'] = df_mensal['TRIBUTO'].astype('category')
+        # Valores anuais (repetidos em todos os meses) resumidos uma única vez por ano/tributo
+        df_anual = df_mensal.groupby(['ANO', 'TRIBUTO'], observed=True, as_index=False).agg(
+            ORCADO=('ORCADO', 'first'),
+            ARRECADADO=('ARRECADADO', 'first'),
+            META=('META', 'first'),
+            SALDO=('SALDO', 'first'),
+            VALOR_MENSAL=('VALOR_MENSAL', 'sum')
+        )
+    else:
+        df_mensal = df_anual = pd.DataFrame()
+    return df_mensal, df_anual, erros_processamento
+
+# ========== FUNÇÃO PARA MONTAR OS GRÁFICOS MENSAIS ==========
+# As figuras ficam em cache pelo conteúdo de df_mensal e pelo tema: reruns
+# causados por outros widgets reaproveitam os objetos sem refazer traces e layout
+@st.cache_resource(hash_funcs=HASH_FUNCS_DF, show_spinner=False, max_entries=MAX_ENTRADAS_CACHE)
+def montar_graficos_mensais(df_mensal, df_anual, tema_grafico, sufixo_titulo, termo_comparativo, cores_comparacao):
+    # Gráfico de linha para evolução mensal
+    # Ordenar por tributo, ano e número do mês (sem copiar o frame nem mapear nomes)
+    df_mensal_ordenado = df_mensal.sort_values(['TRIBUTO', 'ANO', 'MES'])
+    
+    fig_mensal = px.line(
+        df_mensal_ordenado,
+        x='NOME_MES',
+        y='VALOR_MENSAL',
+        color='TRIBUTO',
+        title=f'Evolução Mensal{sufixo_titulo} por Tributo',
+        render_mode='webgl',
+        template=tema_grafico
+    )
+    
+    fig_mensal.update_layout(
+        height=400,
+        title_x=0.5,
+        yaxis=EIXO_MOEDA_BR
+    )
+    
+    # Gráfico de barras para comparação orçado vs arrecadado
+    # Formato longo (uma linha por ano/tributo/série) para montar tudo em uma chamada
+    df_comparacao_longo = df_anual.melt(
+        id_vars=['ANO', 'TRIBUTO'],
+        value_vars=['ORCADO', 'ARRECADADO'],
+        var_name='SERIE',
+        value_name='VALOR'
+    )
+    df_comparacao_longo['SERIE'] = df_comparacao_longo['SERIE'].map({'ORCADO': 'Orçado', 'ARRECADADO': 'Arrecadado'})
+    
+    # Criar gráfico de barras agrupadas: cor pela série, padrão pelo tributo
+    fig_comparacao = px.bar(
+        df_comparacao_longo,
+        x='ANO',
+        y='VALOR',
+        color='SERIE',
+        pattern_shape='TRIBUTO',
+        color_discrete_map={'Orçado': cores_comparacao[0], 'Arrecadado': cores_comparacao[1]},
+        labels={'ANO': 'Ano', 'VALOR': 'Valor (R$)', 'SERIE': 'Série', 'TRIBUTO': 'Tributo'},
+        opacity=0.8,
+        barmode='group'
+    )
+    
+    fig_comparacao.update_layout(
+        title=f'Orçado vs Arrecadado{sufixo_titulo} por Tributo e Ano',
+        barmode='group',
+        height=400,
+        template=tema_grafico,
+        title_x=0.5,
+        yaxis=EIXO_MOEDA_BR
+    )
+    
+    # Criar gráfico comparativo por mês entre anos
+    # Agrupar também pelo número do mês: o resultado já sai ordenado por ano e mês
+    df_comparativo = df_mensal.groupby(['ANO', 'MES', 'NOME_MES'], observed=True)['VALOR_MENSAL'].sum().reset_index()
+    
+    fig_comparativo_anos = px.line(
+        df_comparativo,
+        x='NOME_MES',
+        y='VALOR_MENSAL',
+        color='ANO',
+        title=f'Comparativo de {termo_comparativo} Mensal Entre Anos',
+        render_mode='webgl',
+        template=tema_grafico
+    )
+    
+    fig_comparativo_anos.update_layout(
+        height=500,
+        title_x=0.5,
+        yaxis=EIXO_MOEDA_BR,
+        xaxis_title="Mês",
+        yaxis_title="Valor Total (R$)"
+    )
+    
+    # Gráfico de barras comparativo por tributo entre anos
+    fig_comparativo_tributos = px.bar(
+        df_anual,
+        x='TRIBUTO',
+        y='VALOR_MENSAL',
+        color='ANO',
+        title=f'Comparativo de {termo_comparativo} por Tributo Entre Anos',
+        template=tema_grafico,
+        barmode='group'
+    )
+    
+    fig_comparativo_tributos.update_layout(
+        height=500,
+        title_x=0.5,
+        yaxis=EIXO_MOEDA_BR,
+        xaxis_title="Tributo",
+        yaxis_title="Valor Total (R$)"
+    )
+    
+    # Percentual de meta por tributo e ano
+    fig_metas = px.bar(
+        df_anual,
+        x='ANO',
+        y='META',
+        color='TRIBUTO',
+        title=f'Percentual de Meta Atingida{sufixo_titulo} por Tributo',
+        template=tema_grafico
+    )
+    
+    fig_metas.update_layout(
+        height=400,
+        title_x=0.5,
+        yaxis=dict(
+            tickformat=".1f",
+            ticksuffix="%",
+            title="Meta (%)"
+        )
+    )
+    
+    # Superávit/déficit por tributo e ano (SALDO = ARRECADADO - ORÇADO);
+    # status baseado no saldo, saldo zero não entra no gráfico
+    df_superavit = df_anual[df_anual['SALDO'] != 0]
+    df_superavit = df_superavit.assign(STATUS=np.where(df_superavit['SALDO'] > 0, 'Superávit', 'Déficit'))
+    
+    # Criar gráfico com cores diferentes para superávit e déficit
+    fig_superavit = px.bar(
+        df_superavit,
+        x='ANO',
+        y='SALDO',
+        color='STATUS',
+        pattern_shape='TRIBUTO',
+        color_discrete_map={'Superávit': 'green', 'Déficit': 'red'},
+        labels={'ANO': 'Ano', 'STATUS': 'Status', 'TRIBUTO': 'Tributo'},
+        opacity=0.8
+    )
+    
+    fig_superavit.update_layout(
+        title=f'Superávit/Déficit{sufixo_titulo} por Tributo e Ano (ARRECADADO - ORÇADO)',
+        height=400,
+        template=tema_grafico,
+        title_x=0.5,
+        yaxis=dict(EIXO_MOEDA_BR, title="Saldo (R$)"),
+        barmode='group'
+    )
+    
+    # Adicionar linha de referência em zero
+    fig_superavit.add_hline(y=0, line_dash="dash", line_color="black", line_width=2)
+    
+    return {
+        'mensal': fig_mensal,
+        'comparacao': fig_comparacao,
+        'comparativo_anos': fig_comparativo_anos,
+        'comparativo_tributos': fig_comparativo_tributos,
+        'metas': fig_metas,
+        'superavit': fig_superavit
+    }
 
+# ========== FUNÇÃO PARA GERAR O CSV CONSOLIDADO ==========
+# Executada pelo botão de download apenas no clique, fora da execução da aba.
+# O CSV é escrito pelo writer em C++ do PyArrow; o BOM UTF-8 no início faz o
+# Excel reconhecer a acentuação (SUPERÁVIT/DÉFICIT)
+BOM_UTF8 = b"\xef\xbb\xbf"
 
+def gerar_csv_consolidado(df_consolidado):
+    # Colunas formatadas substituídas via assign, sem cópia explícita
+    df_download = df_consolidado.assign(
+        ORCADO=df_consolidado['ORCADO'].map("R$ {:,.2f}".format),
+        ARRECADADO=df_consolidado['ARRECADADO'].map("R$ {:,.2f}".format),
+        META=df_consolidado['META'].map("{:.1f}%".format),
+        SALDO=df_consolidado['SALDO'].map("R$ {:,.2f}".format),
+        PERCENTUAL_REALIZACAO=df_consolidado['PERCENTUAL_REALIZACAO'].map("{:.1f}%".format)
+    )
+    buffer = io.BytesIO()
+    buffer.write(BOM_UTF8)
+    pa_csv.write_csv(pa.Table.from_pandas(df_download, preserve_index=False), buffer)
+    return buffer.getvalue()
 
-# ========== ABA 4: ARRECADAÇÃO DÍVIDA ATIVA ==========
-with tab4:
-    st.markdown("## 💳 Arrecadação Dívida Ativa")
+# ========== FUNÇÃO PARA RENDERIZAR ABAS MENSAIS (EVOLUÇÃO / DÍVIDA ATIVA) ==========
+# Cada aba mensal roda como fragmento: interações dentro dela (downloads)
+# reexecutam só a própria aba, sem refazer as demais
+@st.fragment
+def renderizar_aba_mensal(arquivo, titulo, descricao_fonte, formato_dados, nome_dados,
+                          rotulo_arrecadado, sufixo_titulo, termo_comparativo,
+                          cores_comparacao, prefixo_csv):
+    st.markdown(f"## {titulo}")
     
     # Informações sobre o arquivo fonte
     st.markdown("### 📁 Arquivo Fonte dos Dados")
     col_info1, col_info2 = st.columns([2, 1])
     
     with col_info1:
-        st.info("""
-        **📊 Fonte:** `Arrecadacao Divida Ativa.xlsx`
-        
-        **📋 Descrição:** Dados de arrecadação de dívida ativa municipal, 
-        contendo valores mensais de orçado, arrecadado e metas por tributo.
-        
-        **📅 Período:** Dados mensais organizados por ano em abas separadas
-        **💳 Tipo:** Arrecadação de dívida ativa por tributo
-        """)
+        st.info(descricao_fonte)
     
     with col_info2:
         # Verificar se o arquivo existe e mostrar informações
         try:
             import os
-            arquivo_info = "Arrecadacao Divida Ativa.xlsx"
+            arquivo_info = arquivo
             if os.path.exists(arquivo_info):
                 stat_info = os.stat(arquivo_info)
                 tamanho_mb = stat_info.st_size / (1024 * 1024)
@@ -1546,18 +1315,7 @@ with tab4:
     
     # Botão para download do arquivo original
     st.markdown("### 💾 Download do Arquivo Original")
-    try:
-        with open("Arrecadacao Divida Ativa.xlsx", "rb") as file:
-            st.download_button(
-                label="📥 Download Arrecadacao Divida Ativa.xlsx",
-                data=file.read(),
-                file_name="Arrecadacao Divida Ativa.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-    except FileNotFoundError:
-        st.warning("⚠️ Arquivo não disponível para download")
-    except Exception as e:
-        st.error(f"❌ Erro ao preparar download: {e}")
+    botao_download_original(arquivo)
     
     st.markdown("---")
     
@@ -1586,51 +1344,57 @@ with tab4:
             if meses_selecionados:
                 st.info(f"📅 **Meses selecionados:** {', '.join(meses_selecionados)}")
     
+    # Arquivo ausente: avisar e encerrar a aba antes de qualquer leitura
+    if not os.path.exists(arquivo):
+        st.warning(f"📁 O arquivo '{arquivo}' não foi encontrado.")
+        return
+    
     try:
-        # Carregar dados de dívida ativa
-        xl_divida = pd.ExcelFile('Arrecadacao Divida Ativa.xlsx')
-        anos_disponiveis_divida = xl_divida.sheet_names
+        # Carregar dados do arquivo (abas em cache até o arquivo ser modificado)
+        mtime_arquivo = mtime_planilha(arquivo)
+        abas_arquivo = carregar_abas(arquivo, mtime_arquivo)
+        anos_disponiveis_arquivo = list(abas_arquivo.keys())
         
         # Verificar se há abas no arquivo
-        if not anos_disponiveis_divida:
-            st.error("❌ O arquivo 'Arrecadacao Divida Ativa.xlsx' não possui abas.")
+        if not anos_disponiveis_arquivo:
+            st.error(f"❌ O arquivo '{arquivo}' não possui abas.")
             st.stop()
         
-        st.success(f"✅ Arquivo carregado com sucesso! Encontradas {len(anos_disponiveis_divida)} abas: {', '.join(anos_disponiveis_divida)}")
+        st.success(f"✅ Arquivo carregado com sucesso! Encontradas {len(anos_disponiveis_arquivo)} abas: {', '.join(anos_disponiveis_arquivo)}")
         
         # Mostrar prévia dos dados
         st.markdown("### 👀 Prévia dos Dados")
         st.info(f"""
         **📊 Estrutura do arquivo:**
-        - **Total de abas:** {len(anos_disponiveis_divida)} anos
-        - **Abas disponíveis:** {', '.join(anos_disponiveis_divida)}
-        - **Formato:** Dados mensais de dívida ativa organizados por ano
+        - **Total de abas:** {len(anos_disponiveis_arquivo)} anos
+        - **Abas disponíveis:** {', '.join(anos_disponiveis_arquivo)}
+        - **Formato:** {formato_dados}
         """)
         
         # Mostrar prévia da primeira aba
-        if anos_disponiveis_divida:
+        if anos_disponiveis_arquivo:
             try:
-                df_previa = pd.read_excel('Arrecadacao Divida Ativa.xlsx', sheet_name=anos_disponiveis_divida[0])
+                df_previa = abas_arquivo[anos_disponiveis_arquivo[0]]
                 # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
                 df_previa.columns = df_previa.columns.astype(str)
-                with st.expander(f"📋 Ver primeiras linhas da aba '{anos_disponiveis_divida[0]}'", expanded=False):
-                    st.dataframe(df_previa.head(10), use_container_width=True)
+                with st.expander(f"📋 Ver primeiras linhas da aba '{anos_disponiveis_arquivo[0]}'", expanded=False):
+                    st.dataframe(df_previa.head(10), width="stretch")
             except Exception as e:
-                st.warning(f"⚠️ Não foi possível mostrar prévia da aba {anos_disponiveis_divida[0]}: {e}")
+                st.warning(f"⚠️ Não foi possível mostrar prévia da aba {anos_disponiveis_arquivo[0]}: {e}")
         
         # Usar filtros globais se disponíveis, senão usar todos os anos
-        # Filtrar apenas anos que existem no arquivo de dívida ativa
-        anos_divida_selecionados = [ano for ano in (anos_selecionados if anos_selecionados else anos_disponiveis_divida) if ano in anos_disponiveis_divida]
+        # Filtrar apenas anos que existem no arquivo
+        anos_arquivo_selecionados = [ano for ano in (anos_selecionados if anos_selecionados else anos_disponiveis_arquivo) if ano in anos_disponiveis_arquivo]
         
-        if not anos_divida_selecionados:
-            st.warning("⚠️ Nenhum dos anos selecionados globalmente existe no arquivo de dívida ativa.")
-            anos_divida_selecionados = anos_disponiveis_divida
+        if not anos_arquivo_selecionados:
+            st.warning(f"⚠️ Nenhum dos anos selecionados globalmente existe no arquivo de {nome_dados}.")
+            anos_arquivo_selecionados = anos_disponiveis_arquivo
         
         # Carregar um ano para obter os tributos disponíveis
-        tributos_divida = []
-        if anos_divida_selecionados:
+        tributos_arquivo = []
+        if anos_arquivo_selecionados:
             try:
-                df_temp = pd.read_excel('Arrecadacao Divida Ativa.xlsx', sheet_name=anos_divida_selecionados[0])
+                df_temp = abas_arquivo[anos_arquivo_selecionados[0]]
                 # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
                 df_temp.columns = df_temp.columns.astype(str)
                 
@@ -1642,16 +1406,16 @@ with tab4:
                     coluna_tributo = 'TRIBUTO'
                 
                 if coluna_tributo:
-                    tributos_divida = df_temp[coluna_tributo].unique().tolist()
-                    st.success(f"✅ Encontrados {len(tributos_divida)} tributos na aba {anos_divida_selecionados[0]} (coluna: {coluna_tributo})")
+                    tributos_arquivo = df_temp[coluna_tributo].unique().tolist()
+                    st.success(f"✅ Encontrados {len(tributos_arquivo)} tributos na aba {anos_arquivo_selecionados[0]} (coluna: {coluna_tributo})")
                 else:
-                    st.error(f"❌ Coluna de tributo não encontrada na aba {anos_divida_selecionados[0]}")
+                    st.error(f"❌ Coluna de tributo não encontrada na aba {anos_arquivo_selecionados[0]}")
                     st.write("Colunas disponíveis:", list(df_temp.columns))
             except Exception as e:
-                st.error(f"❌ Erro ao carregar aba {anos_divida_selecionados[0]}: {e}")
+                st.error(f"❌ Erro ao carregar aba {anos_arquivo_selecionados[0]}: {e}")
         
         # Usar filtros globais de tributos se disponíveis, senão usar todos os tributos
-        tributos_divida_selecionados = tributos_selecionados if tributos_selecionados else tributos_divida
+        tributos_arquivo_selecionados = tributos_selecionados if tributos_selecionados else tributos_arquivo
         
         # Mapear meses selecionados para números
         meses_para_numero = {
@@ -1660,80 +1424,19 @@ with tab4:
         }
         
         # Usar filtros globais de meses se disponíveis, senão usar todos os meses
-        meses_divida_selecionados = [meses_para_numero[mes] for mes in meses_selecionados] if meses_selecionados else list(range(1, 13))
+        meses_arquivo_selecionados = [meses_para_numero[mes] for mes in meses_selecionados] if meses_selecionados else list(range(1, 13))
         
-        if not anos_divida_selecionados:
+        if not anos_arquivo_selecionados:
             st.warning("⚠️ Nenhum ano selecionado para análise.")
         else:
-            # Carregar e processar dados
-            dados_divida = []
-            erros_processamento = []
-            
-            for ano in anos_divida_selecionados:
-                try:
-                    df_ano = pd.read_excel('Arrecadacao Divida Ativa.xlsx', sheet_name=ano)
-                    # Converter todos os nomes de colunas para string para evitar warning de tipos mistos
-                    df_ano.columns = df_ano.columns.astype(str)
-                    
-                    # Verificar se a coluna necessária existe (pode ser 'TRIBUTO/MÊS/ANO' ou 'TRIBUTO')
-                    coluna_tributo = None
-                    if 'TRIBUTO/MÊS/ANO' in df_ano.columns:
-                        coluna_tributo = 'TRIBUTO/MÊS/ANO'
-                    elif 'TRIBUTO' in df_ano.columns:
-                        coluna_tributo = 'TRIBUTO'
-                    
-                    if not coluna_tributo:
-                        erros_processamento.append(f"Coluna de tributo não encontrada na aba {ano}")
-                        continue
-                    
-                    # Filtrar tributos selecionados
-                    if tributos_divida_selecionados:
-                        df_ano = df_ano[df_ano[coluna_tributo].isin(tributos_divida_selecionados)]
-                    
-                    # Verificar se há dados após filtro
-                    if df_ano.empty:
-                        erros_processamento.append(f"Nenhum dado encontrado na aba {ano} após aplicar filtros")
-                        continue
-                    
-                    # Processar dados mensais
-                    for _, row in df_ano.iterrows():
-                        tributo = row[coluna_tributo]
-                        
-                        # Verificar se as colunas necessárias existem
-                        colunas_necessarias = ['ORÇADO', 'ARRECADADO', 'META']
-                        if not all(col in df_ano.columns for col in colunas_necessarias):
-                            erros_processamento.append(f"Colunas necessárias não encontradas na aba {ano}")
-                            continue
-                        
-                        # Processar colunas de meses (colunas 1-12) - apenas meses selecionados
-                        for i in meses_divida_selecionados:
-                            if i < len(df_ano.columns):
-                                col_mes = df_ano.columns[i]
-                                if pd.notna(row[col_mes]) and row[col_mes] != 0:
-                                    try:
-                                        # Calcular superávit/déficit usando a fórmula ARRECADADO - ORÇADO
-                                        saldo = row['ARRECADADO'] - row['ORÇADO']
-                                        superavit = saldo if saldo > 0 else 0
-                                        deficit = abs(saldo) if saldo < 0 else 0
-                                        
-                                        dados_divida.append({
-                                            'ANO': ano,
-                                            'TRIBUTO': tributo,
-                                            'MES': i,
-                                            'NOME_MES': list(meses_para_numero.keys())[list(meses_para_numero.values()).index(i)],
-                                            'VALOR_MENSAL': row[col_mes],
-                                            'ORCADO': row['ORÇADO'],
-                                            'ARRECADADO': row['ARRECADADO'],
-                                            'META': row['META'],
-                                            'SALDO': saldo,
-                                            'SUPERAVIT': superavit,
-                                            'DEFICIT': deficit
-                                        })
-                                    except Exception as e:
-                                        erros_processamento.append(f"Erro ao processar linha do tributo {tributo} na aba {ano}: {e}")
-                
-                except Exception as e:
-                    erros_processamento.append(f"Erro ao carregar aba {ano}: {e}")
+            # Carregar e processar dados (em cache por arquivo e filtros)
+            df_mensal, df_anual, erros_processamento = montar_dados_mensais(
+                arquivo,
+                mtime_arquivo,
+                tuple(sorted(anos_arquivo_selecionados)),
+                tuple(sorted(tributos_arquivo_selecionados, key=str)),
+                tuple(sorted(meses_arquivo_selecionados))
+            )
             
             # Mostrar erros se houver
             if erros_processamento:
@@ -1743,26 +1446,22 @@ with tab4:
                 if len(erros_processamento) > 5:
                     st.write(f"• ... e mais {len(erros_processamento) - 5} erros")
             
-            if dados_divida:
-                df_divida = pd.DataFrame(dados_divida)
-                st.success(f"✅ Processados {len(dados_divida)} registros de dados")
+            if not df_mensal.empty:
+                st.success(f"✅ Processados {len(df_mensal)} registros de dados")
+                
+                # Gráficos em cache (reconstruídos só quando os dados ou o tema mudam)
+                graficos = montar_graficos_mensais(df_mensal, df_anual, tema_grafico, sufixo_titulo, termo_comparativo, cores_comparacao)
                 
                 # Métricas principais
                 st.markdown("### 📊 Métricas Principais")
                 
                 # Calcular métricas para todos os anos selecionados (não apenas o último)
                 # Somatória total dos valores mensais para todos os anos selecionados
-                total_valor_mensal_divida = df_divida['VALOR_MENSAL'].sum()
+                total_valor_mensal = df_mensal['VALOR_MENSAL'].sum()
                 
-                # Calcular orçado e arrecadado totais para todos os anos selecionados
-                df_orcado_arrecadado = df_divida.groupby(['ANO', 'TRIBUTO']).agg({
-                    'ORCADO': 'first',      # Pegar apenas uma vez por tributo/ano
-                    'ARRECADADO': 'first'   # Pegar apenas uma vez por tributo/ano
-                }).reset_index()
-                
-                # Somar orçado e arrecadado para todos os anos selecionados
-                total_orcado_divida = df_orcado_arrecadado['ORCADO'].sum()
-                total_arrecadado_divida = df_orcado_arrecadado['ARRECADADO'].sum()
+                # Somar orçado e arrecadado (uma vez por tributo/ano) para todos os anos selecionados
+                total_orcado = df_anual['ORCADO'].sum()
+                total_arrecadado = df_anual['ARRECADADO'].sum()
                 
                 # Layout de métricas
                 col1, col2, col3, col4 = st.columns(4)
@@ -1770,21 +1469,21 @@ with tab4:
                 with col1:
                     st.markdown(f"""
                     <div class="metric-card">
-                        <div class="metric-value">{formatar_moeda_br(total_arrecadado_divida)}</div>
-                        <div class="metric-label">Dívida Ativa</div>
+                        <div class="metric-value">{formatar_moeda_br(total_arrecadado)}</div>
+                        <div class="metric-label">{rotulo_arrecadado}</div>
                     </div>
                     """, unsafe_allow_html=True)
                 
                 with col2:
                     st.markdown(f"""
                     <div class="metric-card">
-                        <div class="metric-value">{formatar_moeda_br(total_orcado_divida)}</div>
+                        <div class="metric-value">{formatar_moeda_br(total_orcado)}</div>
                         <div class="metric-label">Orçado</div>
                     </div>
                     """, unsafe_allow_html=True)
                 
                 with col3:
-                    meta_alcancada = (total_arrecadado_divida / total_orcado_divida * 100) if total_orcado_divida > 0 else 0
+                    meta_alcancada = (total_arrecadado / total_orcado * 100) if total_orcado > 0 else 0
                     st.markdown(f"""
                     <div class="metric-card">
                         <div class="metric-value">{meta_alcancada:.1f}%</div>
@@ -1793,7 +1492,7 @@ with tab4:
                     """, unsafe_allow_html=True)
                 
                 with col4:
-                    superavit_deficit = total_arrecadado_divida - total_orcado_divida
+                    superavit_deficit = total_arrecadado - total_orcado
                     status = "SUPERÁVIT" if superavit_deficit > 0 else "DÉFICIT"
                     st.markdown(f"""
                     <div class="metric-card">
@@ -1802,314 +1501,94 @@ with tab4:
                     </div>
                     """, unsafe_allow_html=True)
                 
-                # Gráficos de dívida ativa
+                # Gráficos mensais
                 st.markdown("### 📈 Análise Temporal")
                 
                 # Gráfico 1: Evolução mensal por tributo
-                col_divida1, col_divida2 = st.columns(2)
+                col_mensal1, col_mensal2 = st.columns(2)
                 
-                with col_divida1:
-                    # Gráfico de linha para evolução mensal
-                    # Preparar dados com ordenação correta dos meses
-                    df_divida_mensal = df_divida.copy()
-                    
-                    # Criar mapeamento de meses para ordenação
-                    ordem_meses = {
-                        "Janeiro": 1, "Fevereiro": 2, "Março": 3, "Abril": 4, "Maio": 5, "Junho": 6,
-                        "Julho": 7, "Agosto": 8, "Setembro": 9, "Outubro": 10, "Novembro": 11, "Dezembro": 12
-                    }
-                    
-                    # Adicionar coluna de ordenação
-                    df_divida_mensal['ORDEM_MES'] = df_divida_mensal['NOME_MES'].map(ordem_meses)
-                    
-                    # Ordenar por tributo, ano e ordem do mês
-                    df_divida_mensal = df_divida_mensal.sort_values(['TRIBUTO', 'ANO', 'ORDEM_MES'])
-                    
-                    fig_divida_mensal = px.line(
-                        df_divida_mensal,
-                        x='NOME_MES',
-                        y='VALOR_MENSAL',
-                        color='TRIBUTO',
-                        title='Evolução Mensal Dívida Ativa por Tributo',
-                        template=tema_grafico
-                    )
-                    
-                    fig_divida_mensal.update_layout(
-                        height=400,
-                        title_x=0.5,
-                        yaxis=dict(
-                            tickformat=".2f",
-                            tickprefix="R$ ",
-                            separatethousands=True,
-                        )
-                    )
-                    
-                    st.plotly_chart(fig_divida_mensal, use_container_width=True)
+                with col_mensal1:
+                    st.plotly_chart(graficos['mensal'], width="stretch")
                 
-                with col_divida2:
-                    # Gráfico de barras para comparação orçado vs arrecadado
-                    df_comparacao_divida = df_divida.groupby(['ANO', 'TRIBUTO']).agg({
-                        'ORCADO': 'first',
-                        'ARRECADADO': 'first'
-                    }).reset_index()
-                    
-                    # Criar gráfico de barras agrupadas
-                    fig_comparacao_divida = go.Figure()
-                    
-                    for tributo in df_comparacao_divida['TRIBUTO'].unique():
-                        df_tributo = df_comparacao_divida[df_comparacao_divida['TRIBUTO'] == tributo]
-                        
-                        # Barras para orçado
-                        fig_comparacao_divida.add_trace(go.Bar(
-                            name=f'{tributo} - Orçado',
-                            x=df_tributo['ANO'],
-                            y=df_tributo['ORCADO'],
-                            marker_color='lightcoral',
-                            opacity=0.7
-                        ))
-                        
-                        # Barras para arrecadado
-                        fig_comparacao_divida.add_trace(go.Bar(
-                            name=f'{tributo} - Arrecadado',
-                            x=df_tributo['ANO'],
-                            y=df_tributo['ARRECADADO'],
-                            marker_color='darkred',
-                            opacity=0.9
-                        ))
-                    
-                    fig_comparacao_divida.update_layout(
-                        title='Orçado vs Arrecadado Dívida Ativa por Tributo e Ano',
-                        barmode='group',
-                        height=400,
-                        template=tema_grafico,
-                        title_x=0.5,
-                        yaxis=dict(
-                            tickformat=".2f",
-                            tickprefix="R$ ",
-                            separatethousands=True,
-                        )
-                    )
-                    
-                    st.plotly_chart(fig_comparacao_divida, use_container_width=True)
+                with col_mensal2:
+                    st.plotly_chart(graficos['comparacao'], width="stretch")
                 
                 # Gráfico comparativo entre anos
                 st.markdown("### 🔍 Comparativo Entre Anos")
                 
-                # Criar gráfico comparativo por mês entre anos
-                # Preparar dados com ordenação correta dos meses
-                df_comparativo_divida = df_divida.groupby(['ANO', 'NOME_MES'])['VALOR_MENSAL'].sum().reset_index()
-                
-                # Criar mapeamento de meses para ordenação
-                ordem_meses = {
-                    "Janeiro": 1, "Fevereiro": 2, "Março": 3, "Abril": 4, "Maio": 5, "Junho": 6,
-                    "Julho": 7, "Agosto": 8, "Setembro": 9, "Outubro": 10, "Novembro": 11, "Dezembro": 12
-                }
-                
-                # Adicionar coluna de ordenação
-                df_comparativo_divida['ORDEM_MES'] = df_comparativo_divida['NOME_MES'].map(ordem_meses)
-                
-                # Ordenar por ano e ordem do mês
-                df_comparativo_divida = df_comparativo_divida.sort_values(['ANO', 'ORDEM_MES'])
-                
-                fig_comparativo_anos_divida = px.line(
-                    df_comparativo_divida,
-                    x='NOME_MES',
-                    y='VALOR_MENSAL',
-                    color='ANO',
-                    title='Comparativo de Dívida Ativa Mensal Entre Anos',
-                    template=tema_grafico
-                )
-                
-                fig_comparativo_anos_divida.update_layout(
-                    height=500,
-                    title_x=0.5,
-                    yaxis=dict(
-                        tickformat=".2f",
-                        tickprefix="R$ ",
-                        separatethousands=True,
-                    ),
-                    xaxis_title="Mês",
-                    yaxis_title="Valor Total (R$)"
-                )
-                
-                st.plotly_chart(fig_comparativo_anos_divida, use_container_width=True)
-                
-                # Gráfico de barras comparativo por tributo entre anos
-                fig_comparativo_tributos_divida = px.bar(
-                    df_divida.groupby(['ANO', 'TRIBUTO'])['VALOR_MENSAL'].sum().reset_index(),
-                    x='TRIBUTO',
-                    y='VALOR_MENSAL',
-                    color='ANO',
-                    title='Comparativo de Dívida Ativa por Tributo Entre Anos',
-                    template=tema_grafico,
-                    barmode='group'
-                )
-                
-                fig_comparativo_tributos_divida.update_layout(
-                    height=500,
-                    title_x=0.5,
-                    yaxis=dict(
-                        tickformat=".2f",
-                        tickprefix="R$ ",
-                        separatethousands=True,
-                    ),
-                    xaxis_title="Tributo",
-                    yaxis_title="Valor Total (R$)"
-                )
+                st.plotly_chart(graficos['comparativo_anos'], width="stretch")
                 
-                st.plotly_chart(fig_comparativo_tributos_divida, use_container_width=True)
+                st.plotly_chart(graficos['comparativo_tributos'], width="stretch")
                 
                 # Gráfico 2: Análise de metas
                 st.markdown("### 🎯 Análise de Metas")
                 
-                # Calcular percentual de meta por tributo e ano
-                df_metas_divida = df_divida.groupby(['ANO', 'TRIBUTO']).agg({
-                    'META': 'first'
-                }).reset_index()
-                
-                fig_metas_divida = px.bar(
-                    df_metas_divida,
-                    x='ANO',
-                    y='META',
-                    color='TRIBUTO',
-                    title='Percentual de Meta Atingida Dívida Ativa por Tributo',
-                    template=tema_grafico
-                )
-                
-                fig_metas_divida.update_layout(
-                    height=400,
-                    title_x=0.5,
-                    yaxis=dict(
-                        tickformat=".1f",
-                        ticksuffix="%",
-                        title="Meta (%)"
-                    )
-                )
-                
-                st.plotly_chart(fig_metas_divida, use_container_width=True)
+                st.plotly_chart(graficos['metas'], width="stretch")
                 
                 # Gráfico 3: Análise de superávit/déficit
                 st.markdown("### 💰 Análise de Superávit/Déficit")
                 
-                # Calcular superávit/déficit por tributo e ano usando a fórmula ARRECADADO - ORÇADO
-                df_superavit_divida = df_divida.groupby(['ANO', 'TRIBUTO']).agg({
-                    'ARRECADADO': 'first',
-                    'ORCADO': 'first',
-                    'SALDO': 'first'
-                }).reset_index()
-                
-                # Calcular status baseado no saldo
-                df_superavit_divida['STATUS'] = df_superavit_divida['SALDO'].apply(lambda x: 'SUPERÁVIT' if x > 0 else 'DÉFICIT')
-                
-                # Criar gráfico com cores diferentes para superávit e déficit
-                fig_superavit_divida = go.Figure()
-                
-                for tributo in df_superavit_divida['TRIBUTO'].unique():
-                    df_tributo = df_superavit_divida[df_superavit_divida['TRIBUTO'] == tributo]
-                    
-                    # Separar superávit e déficit
-                    superavit_data = df_tributo[df_tributo['SALDO'] > 0]
-                    deficit_data = df_tributo[df_tributo['SALDO'] < 0]
-                    
-                    # Adicionar barras de superávit (verde)
-                    if not superavit_data.empty:
-                        fig_superavit_divida.add_trace(go.Bar(
-                            name=f'{tributo} - Superávit',
-                            x=superavit_data['ANO'],
-                            y=superavit_data['SALDO'],
-                            marker_color='green',
-                            opacity=0.8,
-                            showlegend=True
-                        ))
-                    
-                    # Adicionar barras de déficit (vermelho)
-                    if not deficit_data.empty:
-                        fig_superavit_divida.add_trace(go.Bar(
-                            name=f'{tributo} - Déficit',
-                            x=deficit_data['ANO'],
-                            y=deficit_data['SALDO'],
-                            marker_color='red',
-                            opacity=0.8,
-                            showlegend=True
-                        ))
-                
-                fig_superavit_divida.update_layout(
-                    title='Superávit/Déficit Dívida Ativa por Tributo e Ano (ARRECADADO - ORÇADO)',
-                    height=400,
-                    template=tema_grafico,
-                    title_x=0.5,
-                    yaxis=dict(
-                        tickformat=".2f",
-                        tickprefix="R$ ",
-                        separatethousands=True,
-                        title="Saldo (R$)"
-                    ),
-                    barmode='group'
-                )
-                
-                # Adicionar linha de referência em zero
-                fig_superavit_divida.add_hline(y=0, line_dash="dash", line_color="black", line_width=2)
-                
-                st.plotly_chart(fig_superavit_divida, use_container_width=True)
+                st.plotly_chart(graficos['superavit'], width="stretch")
                 
                 # Análise detalhada de superávit/déficit
                 st.markdown("### 📊 Análise Detalhada de Superávit/Déficit")
                 
-                # Criar métricas por status
+                # Criar métricas por status (máscaras calculadas uma vez sobre o array de saldos)
+                saldos = df_anual['SALDO'].to_numpy()
+                mascara_superavit = saldos > 0
+                mascara_deficit = saldos < 0
+                
                 col_analise1, col_analise2, col_analise3 = st.columns(3)
                 
                 with col_analise1:
-                    total_superavit_divida = df_superavit_divida[df_superavit_divida['SALDO'] > 0]['SALDO'].sum()
+                    total_superavit = saldos[mascara_superavit].sum()
                     st.metric(
-                        label="💰 Total Superávit Dívida Ativa",
-                        value=formatar_moeda_br(total_superavit_divida),
-                        delta=f"{len(df_superavit_divida[df_superavit_divida['SALDO'] > 0])} registros"
+                        label=f"💰 Total Superávit{sufixo_titulo}",
+                        value=formatar_moeda_br(total_superavit),
+                        delta=f"{mascara_superavit.sum()} registros"
                     )
                 
                 with col_analise2:
-                    total_deficit_divida = abs(df_superavit_divida[df_superavit_divida['SALDO'] < 0]['SALDO'].sum())
+                    total_deficit = abs(saldos[mascara_deficit].sum())
                     st.metric(
-                        label="📉 Total Déficit Dívida Ativa",
-                        value=formatar_moeda_br(total_deficit_divida),
-                        delta=f"{len(df_superavit_divida[df_superavit_divida['SALDO'] < 0])} registros"
+                        label=f"📉 Total Déficit{sufixo_titulo}",
+                        value=formatar_moeda_br(total_deficit),
+                        delta=f"{mascara_deficit.sum()} registros"
                     )
                 
                 with col_analise3:
-                    saldo_geral_divida = df_superavit_divida['SALDO'].sum()
+                    saldo_geral = np.nansum(saldos)
                     st.metric(
-                        label="⚖️ Saldo Geral Dívida Ativa",
-                        value=formatar_moeda_br(saldo_geral_divida),
-                        delta="Superávit" if saldo_geral_divida > 0 else "Déficit"
+                        label=f"⚖️ Saldo Geral{sufixo_titulo}",
+                        value=formatar_moeda_br(saldo_geral),
+                        delta="Superávit" if saldo_geral > 0 else "Déficit"
                     )
                 
                 # Tabela de dados consolidados
                 st.markdown("### 📋 Dados Consolidados")
                 
-                # Criar tabela consolidada usando a fórmula ARRECADADO - ORÇADO
-                df_consolidado_divida = df_divida.groupby(['ANO', 'TRIBUTO']).agg({
-                    'ORCADO': 'first',
-                    'ARRECADADO': 'first',
-                    'META': 'first',
-                    'SALDO': 'first'
-                }).reset_index()
+                # Criar tabela consolidada a partir do resumo anual (SALDO = ARRECADADO - ORÇADO)
+                df_consolidado = df_anual.drop(columns='VALOR_MENSAL')
                 
                 # Calcular status baseado no saldo
-                df_consolidado_divida['STATUS'] = df_consolidado_divida['SALDO'].apply(lambda x: 'SUPERÁVIT' if x > 0 else 'DÉFICIT')
-                
-                # Adicionar coluna de percentual de realização
-                df_consolidado_divida['PERCENTUAL_REALIZACAO'] = (df_consolidado_divida['ARRECADADO'] / df_consolidado_divida['ORCADO'] * 100).round(1)
-                
-                # Formatar dados para exibição
-                df_consolidado_divida_formatado = df_consolidado_divida.copy()
-                df_consolidado_divida_formatado['ORCADO'] = df_consolidado_divida_formatado['ORCADO'].apply(formatar_moeda_br)
-                df_consolidado_divida_formatado['ARRECADADO'] = df_consolidado_divida_formatado['ARRECADADO'].apply(formatar_moeda_br)
-                df_consolidado_divida_formatado['META'] = df_consolidado_divida_formatado['META'].apply(lambda x: f"{x:.1f}%")
-                df_consolidado_divida_formatado['SALDO'] = df_consolidado_divida_formatado['SALDO'].apply(formatar_moeda_br)
-                df_consolidado_divida_formatado['PERCENTUAL_REALIZACAO'] = df_consolidado_divida_formatado['PERCENTUAL_REALIZACAO'].apply(lambda x: f"{x:.1f}%")
+                df_consolidado['STATUS'] = np.where(mascara_superavit, 'SUPERÁVIT', 'DÉFICIT')
+                
+                # Adicionar coluna de percentual de realização (uma única divisão vetorizada;
+                # orçado zerado resulta em 0%, como na métrica "Meta Atingida")
+                orcados = df_consolidado['ORCADO'].to_numpy()
+                percentual_realizacao = np.divide(
+                    df_consolidado['ARRECADADO'].to_numpy() * 100, orcados,
+                    out=np.zeros(len(orcados)), where=orcados > 0
+                )
+                df_consolidado['PERCENTUAL_REALIZACAO'] = np.round(percentual_realizacao, 1)
                 
-                # Selecionar colunas para exibição
+                # Selecionar colunas para exibição (valores formatados no padrão BR)
                 colunas_exibicao = ['ANO', 'TRIBUTO', 'ORCADO', 'ARRECADADO', 'PERCENTUAL_REALIZACAO', 'META', 'SALDO', 'STATUS']
-                df_exibicao_divida = df_consolidado_divida_formatado[colunas_exibicao]
+                df_exibicao = tabela_formatada_br(
+                    df_consolidado[colunas_exibicao],
+                    ['ORCADO', 'ARRECADADO', 'SALDO'],
+                    ['PERCENTUAL_REALIZACAO', 'META']
+                )
                 
                 # Explicação das colunas da tabela
                 st.markdown("""
@@ -2125,28 +1604,19 @@ with tab4:
                 """)
                 
                 st.dataframe(
-                    df_exibicao_divida,
-                    use_container_width=True,
+                    df_exibicao,
+                    width="stretch",
                     hide_index=True
                 )
                 
                 # Download dos dados
                 st.markdown("### 💾 Download dos Dados")
                 
-                # Preparar dados para download
-                df_download_divida = df_consolidado_divida.copy()
-                df_download_divida['ORCADO'] = df_download_divida['ORCADO'].apply(lambda x: f"R$ {x:,.2f}")
-                df_download_divida['ARRECADADO'] = df_download_divida['ARRECADADO'].apply(lambda x: f"R$ {x:,.2f}")
-                df_download_divida['META'] = df_download_divida['META'].apply(lambda x: f"{x:.1f}%")
-                df_download_divida['SALDO'] = df_download_divida['SALDO'].apply(lambda x: f"R$ {x:,.2f}")
-                df_download_divida['PERCENTUAL_REALIZACAO'] = df_download_divida['PERCENTUAL_REALIZACAO'].apply(lambda x: f"{x:.1f}%")
-                
-                # Criar arquivo CSV para download
-                csv_divida = df_download_divida.to_csv(index=False, encoding='utf-8-sig')
+                # O CSV só é montado quando o usuário clica no botão (data como função)
                 st.download_button(
-                    label="📥 Download CSV Dívida Ativa",
-                    data=csv_divida,
-                    file_name=f"divida_ativa_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+                    label=f"📥 Download CSV{sufixo_titulo}",
+                    data=lambda: gerar_csv_consolidado(df_consolidado),
+                    file_name=f"{prefixo_csv}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
                     mime="text/csv"
                 )
             else:
@@ -2154,12 +1624,58 @@ with tab4:
                 if erros_processamento:
                     st.error("❌ Verifique os erros acima para entender por que nenhum dado foi processado.")
     
-    except FileNotFoundError:
-        st.warning("📁 O arquivo 'Arrecadacao Divida Ativa.xlsx' não foi encontrado.")
     except Exception as e:
-        st.error(f"❌ Erro ao carregar dados de dívida ativa: {e}")
+        st.error(f"❌ Erro ao carregar dados de {nome_dados}: {e}")
         st.write("Detalhes do erro:", str(e))
 
+# ========== ABA 3: EVOLUÇÃO ARRECADAÇÃO ==========
+with tab3:
+    if tab3.open:
+        renderizar_aba_mensal(
+            arquivo="Evolucao Arrecadacao.xlsx",
+            titulo="📈 Evolução Arrecadação",
+            descricao_fonte="""
+            **📊 Fonte:** `Evolucao Arrecadacao.xlsx`
+            
+            **📋 Descrição:** Dados detalhados de evolução mensal da arrecadação, 
+            contendo orçado, arrecadado e metas por tributo e mês.
+            
+            **📅 Período:** Dados mensais organizados por ano em abas separadas
+            **📊 Métricas:** Orçado, Arrecadado, Meta, Superávit/Déficit
+            """,
+            formato_dados="Dados mensais organizados por ano",
+            nome_dados="evolução",
+            rotulo_arrecadado="Arrecadado",
+            sufixo_titulo="",
+            termo_comparativo="Arrecadação",
+            cores_comparacao=("lightblue", "darkblue"),
+            prefixo_csv="evolucao_arrecadacao"
+        )
+
+# ========== ABA 4: ARRECADAÇÃO DÍVIDA ATIVA ==========
+with tab4:
+    if tab4.open:
+        renderizar_aba_mensal(
+            arquivo="Arrecadacao Divida Ativa.xlsx",
+            titulo="💳 Arrecadação Dívida Ativa",
+            descricao_fonte="""
+            **📊 Fonte:** `Arrecadacao Divida Ativa.xlsx`
+            
+            **📋 Descrição:** Dados de arrecadação de dívida ativa municipal, 
+            contendo valores mensais de orçado, arrecadado e metas por tributo.
+            
+            **📅 Período:** Dados mensais organizados por ano em abas separadas
+            **💳 Tipo:** Arrecadação de dívida ativa por tributo
+            """,
+            formato_dados="Dados mensais de dívida ativa organizados por ano",
+            nome_dados="dívida ativa",
+            rotulo_arrecadado="Dívida Ativa",
+            sufixo_titulo=" Dívida Ativa",
+            termo_comparativo="Dívida Ativa",
+            cores_comparacao=("lightcoral", "darkred"),
+            prefixo_csv="divida_ativa"
+        )
+
 # ========== FOOTER ==========
 st.markdown("---")
 st.markdown("""